@@ -0,0 +1,21 @@
+from django.urls import path
+
+from .async_views import (
+    ingredient_detail,
+    ingredient_list,
+    recipe_detail,
+    recipe_list,
+    tag_detail,
+    tag_list,
+)
+
+urlpatterns = [
+    path('recipes/', recipe_list, name='recipe-list'),
+    path('recipes/<int:pk>/', recipe_detail, name='recipe-detail'),
+    path('tags/', tag_list, name='tag-list'),
+    path('tags/<int:pk>/', tag_detail, name='tag-detail'),
+    path('ingredients/', ingredient_list, name='ingredient-list'),
+    path(
+        'ingredients/<int:pk>/', ingredient_detail, name='ingredient-detail'
+    ),
+]
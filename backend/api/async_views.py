@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from threading import Barrier
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+
+from foodgram.db_router import check_connections
+from recipes.models import Ingredient, Tag
+from .authentication import CachedTokenAuthentication
+from .catalog import get_catalog, get_catalog_response
+from .conditional import get_detail_validators, get_list_validators
+from .fieldsets import get_recipe_queryset, get_requested_fields
+from .filter import RecipeFilter, filter_queryset, get_requested_ids
+from .pagination import CustomPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    IngredientSerializer,
+    RecipeReadSerializer,
+    TagSerializer,
+)
+from .views import (
+    IngredientViewSet,
+    RecipeViewSet,
+    TagViewSet,
+    get_ingredient_list_data,
+    get_recipe_data,
+    get_recipe_list_data,
+)
+
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS,
+    thread_name_prefix='async-db'
+)
+
+
+def run_db(func, *args):
+    """Выполняет работу с БД в ограниченном пуле потоков.
+
+    Каждый поток пула держит одно постоянное подключение
+    (DB_CONN_MAX_AGE > 0 обязателен при ASYNC_READ_VIEWS), поэтому
+    ASYNC_DB_THREADS ограничивает и число подключений процесса.
+    Через run_db идет все, что может прочитать версию справочников:
+    валидаторы, реестры в сериализаторах, поиск и сами справочники.
+    """
+
+    def task():
+        if settings.DB_CONN_HEALTH_CHECKS:
+            check_connections()
+        close_old_connections()
+        return func(*args)
+
+    return sync_to_async(
+        task, thread_sensitive=False, executor=db_executor
+    )()
+
+
+def close_db_connections():
+    """Закрывает подключения всех потоков пула.
+
+    Барьер не дает одному потоку забрать две задачи, так что
+    каждая задача выполняется в своем потоке.
+    """
+
+    barrier = Barrier(settings.ASYNC_DB_THREADS)
+
+    def close():
+        barrier.wait()
+        connections.close_all()
+
+    for future in [
+        db_executor.submit(close)
+        for _ in range(settings.ASYNC_DB_THREADS)
+    ]:
+        future.result()
+
+
+def render(data, status=200):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status
+    )
+
+
+def async_read_view(viewset, actions):
+    """GET обслуживает async-вью, остальные методы - синхронный вьюсет."""
+
+    sync_view = sync_to_async(viewset.as_view(actions))
+
+    def decorator(async_view):
+        @wraps(async_view)
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            drf_request = Request(
+                request, authenticators=(CachedTokenAuthentication(),)
+            )
+            try:
+                await run_db(lambda: drf_request.user)
+                return await async_view(drf_request, *args, **kwargs)
+            except APIException as error:
+                detail = error.detail
+                if not isinstance(detail, (list, dict)):
+                    detail = {'detail': detail}
+                return render(detail, error.status_code)
+
+        view.csrf_exempt = True
+        return view
+    return decorator
+
+
+def get_object(queryset, pk):
+    try:
+        return queryset.get(pk=pk)
+    except (queryset.model.DoesNotExist, ValueError):
+        raise NotFound
+
+
+@async_read_view(RecipeViewSet, {'get': 'list', 'post': 'create'})
+async def recipe_list(request):
+    paginator = CustomPagination()
+    fields = get_requested_fields(
+        request.query_params, RecipeReadSerializer.Meta.fields
+    )
+    ids = get_requested_ids(request.query_params)
+
+    def get_validators():
+        queryset = filter_queryset(
+            RecipeFilter, get_recipe_queryset(fields), request
+        )
+        return queryset, get_list_validators(
+            request, queryset, ids, paginator
+        )
+
+    queryset, validators = await run_db(get_validators)
+    if validators is not None:
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+    response = render(await run_db(
+        get_recipe_list_data, request, queryset, ids, paginator, fields
+    ))
+    if validators is None:
+        return response
+    return validators.apply(response)
+
+
+@async_read_view(RecipeViewSet, {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+})
+async def recipe_detail(request, pk):
+    fields = get_requested_fields(
+        request.query_params, RecipeReadSerializer.Meta.fields
+    )
+    queryset = get_recipe_queryset(fields)
+    validators = await run_db(
+        get_detail_validators, request, queryset, pk
+    )
+    if validators is None:
+        raise NotFound
+    not_modified = validators.not_modified()
+    if not_modified is not None:
+        return not_modified
+    return validators.apply(render(await run_db(
+        lambda: get_recipe_data(request, get_object(queryset, pk), fields)
+    )))
+
+
+@async_read_view(TagViewSet, {'get': 'list'})
+async def tag_list(request):
+    return render(await run_db(get_catalog, Tag))
+
+
+@async_read_view(TagViewSet, {'get': 'retrieve'})
+async def tag_detail(request, pk):
+    tag = await run_db(get_object, TagViewSet.queryset.all(), pk)
+    return render(TagSerializer(tag).data)
+
+
+@async_read_view(IngredientViewSet, {'get': 'list'})
+async def ingredient_list(request):
+    data = await run_db(get_ingredient_list_data, request)
+    if data is None:
+        return await run_db(get_catalog_response, Ingredient, request)
+    return render(data)
+
+
+@async_read_view(IngredientViewSet, {'get': 'retrieve'})
+async def ingredient_detail(request, pk):
+    ingredient = await run_db(
+        get_object, IngredientViewSet.queryset.all(), pk
+    )
+    return render(IngredientSerializer(ingredient).data)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.db_router import primary_reads
+from .metrics import record_cache
+
+
+def get_token_cache():
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def get_token_cache_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_tokens(keys):
+    """Удаляет из кэша пары (user, token) для переданных ключей."""
+
+    get_token_cache().delete_many(
+        [get_token_cache_key(key) for key in keys]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, который хранит token -> user в TTL-кэше."""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cache_key = get_token_cache_key(key)
+        credentials = cache.get(cache_key)
+        record_cache('tokens', credentials is not None)
+        if credentials is None:
+            with primary_reads():
+                credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials)
+        return credentials
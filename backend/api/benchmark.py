@@ -0,0 +1,392 @@
+import asyncio
+import base64
+import io
+import random
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from csv import reader
+from math import ceil
+from queue import Empty, Queue
+from statistics import median
+from time import perf_counter
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    Tag,
+)
+from user.models import Subscribe, User
+
+BENCHMARK_PASSWORD = 'benchmark-Pass-123'
+
+Endpoint = namedtuple(
+    'Endpoint',
+    ('name', 'method', 'url', 'data', 'auth', 'cleanup'),
+    defaults=(None, True, None)
+)
+AsgiResponse = namedtuple('AsgiResponse', ('status_code', 'content'))
+
+
+def make_png(size=(32, 32), color=(200, 120, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def seed_dataset(users=20, recipes=200, seed=0):
+    """Детерминированный набор данных для замеров."""
+
+    rng = random.Random(seed)
+    with open(
+        settings.BASE_DIR / 'static/data/ingredients.csv',
+        encoding='utf-8'
+    ) as csv_file:
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in reader(csv_file)
+        )
+    Tag.objects.bulk_create(
+        Tag(name=f'Тег {index}', color=f'#0000{index:02d}', slug=f'tag{index}')
+        for index in range(5)
+    )
+    User.objects.bulk_create(
+        User(
+            email=f'bench{index}@example.com',
+            username=f'bench{index}',
+            first_name='Имя',
+            last_name='Фамилия',
+        ) for index in range(users)
+    )
+    authors = list(User.objects.order_by('id'))
+    tags = list(Tag.objects.all())
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    image = ContentFile(make_png(), name='bench.png')
+    image_name = Recipe._meta.get_field('image').generate_filename(
+        None, image.name
+    )
+    image_name = Recipe._meta.get_field('image').storage.save(
+        image_name, image
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=authors[0] if not index else rng.choice(authors),
+            name=f'Рецепт {index}',
+            text='Описание рецепта. ' * 20,
+            image=image_name,
+            cooking_time=rng.randint(5, 120),
+        ) for index in range(recipes)
+    )
+    recipe_list = list(Recipe.objects.all())
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipe_list
+        for tag in rng.sample(tags, rng.randint(1, 3))
+    )
+    RecipeIngredients.objects.bulk_create(
+        RecipeIngredients(
+            recipe_id=recipe.id, ingredients_id=ingredient_id,
+            amount=rng.randint(1, 500)
+        )
+        for recipe in recipe_list
+        for ingredient_id in rng.sample(ingredient_ids, rng.randint(3, 12))
+    )
+    user = authors[0]
+    user.set_password(BENCHMARK_PASSWORD)
+    user.save()
+    for model in (Favorite, Cart):
+        model.objects.bulk_create(
+            model(user=user, recipe=recipe)
+            for recipe in rng.sample(recipe_list, min(20, len(recipe_list)))
+        )
+    Subscribe.objects.bulk_create(
+        Subscribe(user=user, author=author) for author in authors[1:11]
+    )
+    return user
+
+
+class BenchmarkContext:
+    """Идентификаторы объектов, на которые ссылаются эндпоинты."""
+
+    def __init__(self, user):
+        self.user = user
+        self.recipe = Recipe.objects.exclude(author=user).exclude(
+            favourites__user=user
+        ).exclude(carts__user=user).first()
+        self.own_recipe = Recipe.objects.filter(author=user).first()
+        self.author = User.objects.exclude(
+            subscribing__user=user
+        ).exclude(id=user.id).first()
+        self.tag = Tag.objects.first()
+        self.ingredients = list(Ingredient.objects.all()[:3])
+
+    def recipe_payload(self):
+        image = base64.b64encode(make_png()).decode()
+        return {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients
+            ],
+            'tags': [self.tag.id],
+            'image': f'data:image/png;base64,{image}',
+            'name': 'Рецепт для замера',
+            'text': 'Описание',
+            'cooking_time': 10,
+        }
+
+
+def get_endpoints(context):
+    """Все эндпоинты из api/urls.py с параметрами для замера."""
+
+    recipe_id = context.recipe.id
+    own_recipe_id = context.own_recipe.id
+    author_id = context.author.id
+    tag_slug = context.tag.slug
+    return (
+        Endpoint('recipe-list', 'get', '/api/recipes/', auth=False),
+        Endpoint('recipe-list-auth', 'get', '/api/recipes/'),
+        Endpoint('recipe-list-tags', 'get', f'/api/recipes/?tags={tag_slug}'),
+        Endpoint('recipe-list-favorited', 'get',
+                 '/api/recipes/?is_favorited=1'),
+        Endpoint('recipe-list-cart', 'get',
+                 '/api/recipes/?is_in_shopping_cart=1'),
+        Endpoint('recipe-detail', 'get', f'/api/recipes/{recipe_id}/'),
+        Endpoint('recipe-create', 'post', '/api/recipes/',
+                 data=context.recipe_payload,
+                 cleanup=lambda response: Recipe.objects.filter(
+                     id=response.json()['id']).delete()),
+        Endpoint('recipe-update', 'patch', f'/api/recipes/{own_recipe_id}/',
+                 data=context.recipe_payload),
+        Endpoint('recipe-favorite', 'post',
+                 f'/api/recipes/{recipe_id}/favorite/',
+                 cleanup=lambda response: Favorite.objects.filter(
+                     user=context.user, recipe_id=recipe_id).delete()),
+        Endpoint('recipe-shopping-cart', 'post',
+                 f'/api/recipes/{recipe_id}/shopping_cart/',
+                 cleanup=lambda response: Cart.objects.filter(
+                     user=context.user, recipe_id=recipe_id).delete()),
+        Endpoint('recipe-download-shopping-cart', 'get',
+                 '/api/recipes/download_shopping_cart/'),
+        Endpoint('tag-list', 'get', '/api/tags/', auth=False),
+        Endpoint('tag-detail', 'get', f'/api/tags/{context.tag.id}/',
+                 auth=False),
+        Endpoint('ingredient-list', 'get', '/api/ingredients/', auth=False),
+        Endpoint('ingredient-search', 'get', '/api/ingredients/?name=мо',
+                 auth=False),
+        Endpoint('user-list', 'get', '/api/users/'),
+        Endpoint('user-detail', 'get', f'/api/users/{author_id}/'),
+        Endpoint('user-me', 'get', '/api/users/me/'),
+        Endpoint('user-subscriptions', 'get',
+                 '/api/users/subscriptions/?recipes_limit=3'),
+        Endpoint('user-subscribe', 'post',
+                 f'/api/users/{author_id}/subscribe/',
+                 cleanup=lambda response: Subscribe.objects.filter(
+                     user=context.user, author_id=author_id).delete()),
+        Endpoint('auth-token-login', 'post', '/api/auth/token/login/',
+                 data={'email': context.user.email,
+                       'password': BENCHMARK_PASSWORD},
+                 auth=False),
+    )
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def run_endpoint(endpoint, client, repeat):
+    """Возвращает p50/p95 в миллисекундах и число SQL-запросов."""
+
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        data = endpoint.data() if callable(endpoint.data) else endpoint.data
+        request = getattr(client, endpoint.method)
+        with CaptureQueriesContext(connection) as captured:
+            start = perf_counter()
+            if data is None:
+                response = request(endpoint.url)
+            else:
+                response = request(
+                    endpoint.url, data, content_type='application/json'
+                )
+            timings.append((perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{endpoint.name}: {response.status_code} '
+                f'{response.content[:200]!r}'
+            )
+        queries = max(queries, len(captured))
+        if endpoint.cleanup:
+            endpoint.cleanup(response)
+    return {
+        'p50': round(median(timings), 2),
+        'p95': round(percentile(timings, 95), 2),
+        'queries': queries,
+    }
+
+
+def run_benchmark(user, repeat=20, only=None):
+    context = BenchmarkContext(user)
+    token, _ = Token.objects.get_or_create(user=user)
+    auth_client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+    anon_client = Client()
+    results = {}
+    for endpoint in get_endpoints(context):
+        if only and endpoint.name not in only:
+            continue
+        client = auth_client if endpoint.auth else anon_client
+        results[endpoint.name] = run_endpoint(endpoint, client, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Строки отчета и список эндпоинтов с регрессией."""
+
+    lines = [
+        f'{"endpoint":<32}{"p50":>9}{"p95":>9}{"queries":>9}'
+        f'{"Δp95":>9}{"Δq":>5}'
+    ]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        line = (f'{name:<32}{current["p50"]:>9.2f}{current["p95"]:>9.2f}'
+                f'{current["queries"]:>9}')
+        if previous:
+            delta_p95 = (
+                (current['p95'] - previous['p95']) / previous['p95'] * 100
+                if previous['p95'] else 0
+            )
+            delta_queries = current['queries'] - previous['queries']
+            line += f'{delta_p95:>+8.0f}%{delta_queries:>+5}'
+            if delta_p95 > tolerance or delta_queries > 0:
+                regressions.append(name)
+                line += '  <-- регрессия'
+        else:
+            line += f'{"new":>9}'
+        lines.append(line)
+    return lines, regressions
+
+
+class AsgiClient:
+    """GET-запросы прямо в ASGI-приложение, как их отдает uvicorn.
+
+    AsyncClient собирает свой обработчик, а этот клиент проходит
+    через foodgram.asgi.application целиком.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def get(self, url, **headers):
+        path, _, query = url.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': quote(path).encode(),
+            'query_string': quote(query, safe='=&').encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver')] + [
+                (name.lower().replace('_', '-').encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.application(scope, receive, send)
+        return AsgiResponse(
+            messages[0]['status'],
+            b''.join(message.get('body', b'') for message in messages[1:])
+        )
+
+
+async def run_async_load(client, urls, requests, concurrency, **headers):
+    """Нагрузка через AsgiClient: concurrency одновременных запросов."""
+
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def fetch(url):
+        async with semaphore:
+            start = perf_counter()
+            response = await client.get(url, **headers)
+            timings.append((perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f'{url}: {response.status_code} '
+                    f'{response.content[:200]!r}'
+                )
+
+    start = perf_counter()
+    await asyncio.gather(
+        *(fetch(urls[number % len(urls)]) for number in range(requests))
+    )
+    return load_summary(timings, perf_counter() - start)
+
+
+def run_sync_load(make_client, urls, requests, concurrency):
+    """Синхронный путь: concurrency потоков, как у воркера gthread.
+
+    У каждого потока свой Client и свое подключение к БД,
+    подключения закрываются, когда поток разобрал очередь.
+    """
+
+    queue = Queue()
+    for number in range(requests):
+        queue.put(urls[number % len(urls)])
+
+    def worker():
+        client = make_client()
+        timings = []
+        try:
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except Empty:
+                    return timings
+                start = perf_counter()
+                response = client.get(url)
+                timings.append((perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{url}: {response.status_code}')
+        finally:
+            connections.close_all()
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker) for _ in range(concurrency)]
+        timings = [
+            timing for future in futures for timing in future.result()
+        ]
+    return load_summary(timings, perf_counter() - start)
+
+
+def load_summary(timings, elapsed):
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'p50': round(median(timings), 2),
+        'p95': round(percentile(timings, 95), 2),
+    }
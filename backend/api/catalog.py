@@ -0,0 +1,130 @@
+import gzip
+from collections import namedtuple
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.asyncio import async_unsafe
+from django.utils.cache import patch_vary_headers
+
+from foodgram.db_router import primary_reads
+from recipes.models import Change, Ingredient, Tag
+from .metrics import record_cache
+
+CATALOG_MODELS = (Tag, Ingredient)
+
+CatalogPayload = namedtuple(
+    'CatalogPayload', ('version', 'content', 'gzip_content')
+)
+CatalogState = namedtuple('CatalogState', ('version', 'changed_at'))
+checked_versions = {}
+
+
+def get_catalog_serializer(model):
+    from .serializers import IngredientSerializer, TagSerializer
+
+    return {
+        Tag: TagSerializer,
+        Ingredient: IngredientSerializer,
+    }[model]
+
+
+def get_catalog_cache_key(model):
+    return f'catalog:{model._meta.label_lower}'
+
+
+@async_unsafe
+def get_catalog_state(model):
+    """Версия справочника и время его последнего изменения.
+
+    Версия - id последней записи журнала изменений модели. Журнал
+    в БД общий для всех процессов, поэтому правки из других воркеров
+    и import_data меняют версию везде. Процесс перечитывает ее
+    не чаще раза в CATALOG_VERSION_CHECK_INTERVAL секунд.
+
+    Запрос к БД нужен не при каждом вызове, поэтому вызов из
+    event loop запрещен всегда, а не только когда проверка устарела:
+    async-код читает версию, реестры и справочники через run_db.
+    """
+
+    checked = checked_versions.get(model)
+    now = monotonic()
+    if (checked is not None
+            and now - checked[0] < settings.CATALOG_VERSION_CHECK_INTERVAL):
+        return checked[1]
+    with primary_reads():
+        last_id, changed_at = Change.objects.filter(
+            model=model._meta.model_name
+        ).order_by('-id').values_list('id', 'created_at').first() or (
+            0, None
+        )
+    state = CatalogState(str(last_id), changed_at)
+    checked_versions[model] = (now, state)
+    return state
+
+
+def get_catalog_version(model):
+    return get_catalog_state(model).version
+
+
+def get_catalog(model):
+    """Сериализованный справочник целиком, из кэша или из БД.
+
+    Данные читаются с primary после версии, поэтому под ключом версии
+    не может оказаться справочник старше нее.
+    """
+
+    cache_key = f'{get_catalog_cache_key(model)}:{get_catalog_version(model)}'
+    data = cache.get(cache_key)
+    record_cache('catalog', data is not None)
+    if data is None:
+        with primary_reads():
+            data = get_catalog_serializer(model)(
+                model.objects.all(), many=True
+            ).data
+        cache.set(cache_key, data, None)
+    return data
+
+
+def get_catalog_payload(model):
+    """Готовый JSON справочника и его gzip, один раз на версию."""
+
+    from .renderers import FastJSONRenderer
+
+    version = get_catalog_version(model)
+    cache_key = f'{get_catalog_cache_key(model)}:payload:{version}'
+    payload = cache.get(cache_key)
+    record_cache('catalog_payload', payload is not None)
+    if payload is None:
+        content = FastJSONRenderer().render(get_catalog(model))
+        payload = CatalogPayload(
+            version, content, gzip.compress(content, mtime=0)
+        )
+        cache.set(cache_key, payload, None)
+    return payload
+
+
+def get_catalog_response(model, request):
+    """Отдает готовые байты справочника в подходящей кодировке."""
+
+    payload = get_catalog_payload(model)
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if re_accepts_gzip.search(accept_encoding):
+        response = HttpResponse(
+            payload.gzip_content, content_type='application/json'
+        )
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(
+            payload.content, content_type='application/json'
+        )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def invalidate_catalog(model):
+    """Следующий запрос этого процесса сразу перечитает версию."""
+
+    checked_versions.pop(model, None)
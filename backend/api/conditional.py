@@ -0,0 +1,145 @@
+import hashlib
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Exists, OuterRef
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+from recipes.models import Cart, Favorite, Ingredient, Tag
+from user.models import Subscribe
+from .catalog import get_catalog_state
+
+
+def get_state_rows(queryset, user):
+    """Id, даты изменения рецепта и автора, флаги пользователя.
+
+    Автор встроен в ответ, поэтому его правка тоже меняет валидаторы.
+    """
+
+    queryset = queryset.prefetch_related(None)
+    fields = ['id', 'updated_at', 'author__updated_at']
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            state_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            state_in_cart=Exists(Cart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            state_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author')
+            )),
+        )
+        fields += ['state_favorited', 'state_in_cart', 'state_subscribed']
+    return list(queryset.values_list(*fields))
+
+
+def get_page_state_rows(queryset, request, paginator):
+    """Метаданные той же страницы, которую отдаст пагинатор."""
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return get_state_rows(queryset, request.user), None
+    page_number = request.query_params.get(paginator.page_query_param, 1)
+    django_paginator = Paginator(queryset, page_size)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage:
+        return None, None
+    return (
+        get_state_rows(page.object_list, request.user),
+        django_paginator.count
+    )
+
+
+class RecipeValidators:
+    """ETag и Last-Modified для ответа с рецептами.
+
+    Last-Modified есть только у карточки: удаление рецепта меняет
+    состав страницы списка, не двигая максимальный updated_at,
+    поэтому список проверяется только по ETag. Дата карточки
+    учитывает и правку автора, и последнее изменение справочников.
+    """
+
+    def __init__(self, request, rows, count=None,
+                 media_type='application/json', detail=False):
+        self.request = request
+        catalogs = (get_catalog_state(Tag), get_catalog_state(Ingredient))
+        state = (
+            rows,
+            count,
+            media_type,
+            *(catalog.version for catalog in catalogs),
+        )
+        self.etag = quote_etag(
+            hashlib.md5(repr(state).encode()).hexdigest()
+        )
+        self.last_modified = None
+        if detail:
+            dates = [date for row in rows for date in row[1:3]] + [
+                catalog.changed_at for catalog in catalogs
+            ]
+            self.last_modified = max(
+                (date for date in dates if date is not None), default=None
+            )
+
+    def not_modified(self):
+        """304 для If-None-Match или, для анонимов, If-Modified-Since.
+
+        Last-Modified не учитывает избранное и корзину, поэтому
+        для пользователя с токеном проверяется только ETag.
+        """
+
+        last_modified = None
+        if (self.last_modified is not None
+                and not self.request.user.is_authenticated):
+            last_modified = int(self.last_modified.timestamp())
+        response = get_conditional_response(
+            self.request, etag=self.etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(
+                self.last_modified.timestamp()
+            )
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+def get_list_validators(request, queryset, ids, paginator,
+                        media_type='application/json'):
+    """Валидаторы страницы или ?ids=, None для несуществующей страницы."""
+
+    if ids is None:
+        rows, count = get_page_state_rows(queryset, request, paginator)
+    else:
+        rows, count = get_state_rows(
+            queryset.filter(pk__in=ids).order_by('pk'), request.user
+        ), None
+    if rows is None:
+        return None
+    return RecipeValidators(request, rows, count, media_type)
+
+
+def get_detail_validators(request, queryset, pk,
+                          media_type='application/json'):
+    """Валидаторы карточки, None если рецепта нет."""
+
+    try:
+        rows = get_state_rows(queryset.filter(pk=pk), request.user)
+    except (TypeError, ValueError):
+        return None
+    if not rows:
+        return None
+    return RecipeValidators(
+        request, rows, media_type=media_type, detail=True
+    )
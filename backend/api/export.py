@@ -0,0 +1,140 @@
+import json
+import os
+import zipfile
+from collections import defaultdict
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recipes.constants import EXPORT_BATCH_SIZE, EXPORT_CHUNK_SIZE
+from recipes.models import Recipe, RecipeIngredients
+
+RECIPE_EXPORT_FIELDS = (
+    'id', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+    'author__username',
+)
+
+
+class ZipStream:
+    """Приемник для ZipFile: накопленные байты забираются через pop()."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def get_export_sections(user):
+    return (
+        ('recipes', Recipe.objects.filter(author=user)),
+        ('favorites', Recipe.objects.filter(favourites__user=user)),
+    )
+
+
+def get_recipe_relations(recipe_ids):
+    """Теги и ингредиенты пачки рецептов - по запросу на каждое."""
+
+    tags = defaultdict(list)
+    for recipe_id, name, slug in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tag__name', 'tag__slug'):
+        tags[recipe_id].append({'name': name, 'slug': slug})
+    ingredients = defaultdict(list)
+    for recipe_id, name, unit, amount in RecipeIngredients.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(
+        'recipe_id', 'ingredients__name', 'ingredients__measurement_unit',
+        'amount'
+    ):
+        ingredients[recipe_id].append(
+            {'name': name, 'measurement_unit': unit, 'amount': amount}
+        )
+    return tags, ingredients
+
+
+def write_file(archive, stream, name, arcname):
+    """Копирует файл из хранилища в архив кусками EXPORT_CHUNK_SIZE."""
+
+    try:
+        source = default_storage.open(name, 'rb')
+    except FileNotFoundError:
+        return
+    with source, archive.open(zipfile.ZipInfo(arcname), 'w') as target:
+        for chunk in source.chunks(EXPORT_CHUNK_SIZE):
+            target.write(chunk)
+            yield stream.pop()
+
+
+def stream_cookbook(user):
+    """ZIP с рецептами пользователя и избранным, отдаваемый по кускам.
+
+    Рецепты читаются iterator() пачками по EXPORT_BATCH_SIZE,
+    картинки уже сжаты и кладутся в архив без сжатия.
+    """
+
+    for chunk in write_cookbook(user):
+        if chunk:
+            yield chunk
+
+
+def write_cookbook(user):
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        for section, queryset in get_export_sections(user):
+            rows = queryset.order_by('id').values(
+                *RECIPE_EXPORT_FIELDS
+            ).iterator(chunk_size=EXPORT_BATCH_SIZE)
+            for batch in iter_batches(rows, EXPORT_BATCH_SIZE):
+                tags, ingredients = get_recipe_relations(
+                    [row['id'] for row in batch]
+                )
+                for row in batch:
+                    folder = f'{section}/{row["id"]}'
+                    image = None
+                    if row['image']:
+                        image = f'{folder}/{os.path.basename(row["image"])}'
+                    metadata = {
+                        'id': row['id'],
+                        'name': row['name'],
+                        'author': row['author__username'],
+                        'text': row['text'],
+                        'cooking_time': row['cooking_time'],
+                        'pub_date': row['pub_date'],
+                        'tags': tags[row['id']],
+                        'ingredients': ingredients[row['id']],
+                        'image': image,
+                    }
+                    archive.writestr(
+                        f'{folder}/recipe.json',
+                        json.dumps(
+                            metadata, cls=DjangoJSONEncoder,
+                            ensure_ascii=False, indent=2
+                        ),
+                        compress_type=zipfile.ZIP_DEFLATED
+                    )
+                    yield stream.pop()
+                    if image:
+                        yield from write_file(
+                            archive, stream, row['image'], image
+                        )
+    yield stream.pop()
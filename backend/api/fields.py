@@ -0,0 +1,37 @@
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from recipes.constants import MAX_IMAGE_BYTES, MAX_IMAGE_SIDE
+
+
+class Base64ImageField(serializers.ImageField):
+    """Картинка строкой base64 или файлом из multipart/form-data.
+
+    Base64 декодирует Base64ImageField из drf_extra_fields, который
+    импортируется при первой записи. Файл из multipart уже лежит
+    во временном файле и проверяется Pillow прямо с диска.
+    """
+
+    @cached_property
+    def base64_field(self):
+        from drf_extra_fields.fields import Base64ImageField
+
+        field = Base64ImageField(*self._args, **self._kwargs)
+        field.bind(self.field_name, self.parent)
+        return field
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            image = self.base64_field.to_internal_value(data)
+        else:
+            image = super().to_internal_value(data)
+        if image.size > MAX_IMAGE_BYTES:
+            raise serializers.ValidationError(
+                f'Картинка больше {MAX_IMAGE_BYTES // 1024 // 1024} МБ.'
+            )
+        width, height = image.image.size
+        if max(width, height) > MAX_IMAGE_SIDE:
+            raise serializers.ValidationError(
+                f'Картинка больше {MAX_IMAGE_SIDE}px по одной из сторон.'
+            )
+        return image
@@ -0,0 +1,39 @@
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Recipe
+
+
+def parse_field_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_requested_fields(query_params, available):
+    """Поля ответа по параметрам ?fields= и ?omit=."""
+
+    requested = set(available)
+    fields = parse_field_list(query_params.get('fields', ''))
+    omit = parse_field_list(query_params.get('omit', ''))
+    unknown = (fields | omit) - requested
+    if unknown:
+        raise ValidationError({
+            'fields': f'Неизвестные поля: {", ".join(sorted(unknown))}'
+        })
+    if fields:
+        requested &= fields
+    return requested - omit
+
+
+def get_recipe_queryset(fields=None):
+    """Рецепты только с теми связями, которые попадут в ответ.
+
+    Теги и ингредиенты подгружает RecipeReadSerializer.
+    """
+
+    queryset = Recipe.objects.all()
+    if fields is None:
+        fields = {'author', 'tags', 'ingredients', 'text'}
+    if 'author' in fields:
+        queryset = queryset.select_related('author')
+    if 'text' not in fields:
+        queryset = queryset.defer('text')
+    return queryset
@@ -1,6 +1,87 @@
+from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.exceptions import ValidationError
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.constants import MAX_RECIPE_IDS
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from user.models import Subscribe
+
+
+def get_requested_ids(query_params):
+    """Id рецептов из ?ids=1,2,3 без повторов, в порядке запроса."""
+
+    value = query_params.get('ids')
+    if value is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(
+            int(pk) for pk in value.split(',') if pk.strip()
+        ))
+    except ValueError:
+        raise ValidationError({'ids': 'Ожидается список id через запятую.'})
+    if len(ids) > MAX_RECIPE_IDS:
+        raise ValidationError(
+            {'ids': f'Не больше {MAX_RECIPE_IDS} id за запрос.'}
+        )
+    return ids
+
+
+def get_user_flag_querysets(user, recipe_ids=None):
+    """Id избранного, корзины и подписок для контекста сериализатора."""
+
+    favorites = Favorite.objects.filter(user=user)
+    carts = Cart.objects.filter(user=user)
+    if recipe_ids is not None:
+        favorites = favorites.filter(recipe_id__in=recipe_ids)
+        carts = carts.filter(recipe_id__in=recipe_ids)
+    return {
+        'favorited_ids': favorites.values_list('recipe_id', flat=True),
+        'cart_ids': carts.values_list('recipe_id', flat=True),
+        'subscribed_ids': Subscribe.objects.filter(
+            user=user
+        ).values_list('author_id', flat=True),
+    }
+
+
+def get_user_flags(user, recipe_ids=None):
+    """Флаги пользователя множествами, для анонима - пустой словарь."""
+
+    if not user.is_authenticated:
+        return {}
+    return {
+        name: set(flags) for name, flags
+        in get_user_flag_querysets(user, recipe_ids).items()
+    }
+
+
+def filter_queryset(filterset_class, queryset, request):
+    """Фильтрация как в DjangoFilterBackend, но без вьюсета."""
+
+    filterset = filterset_class(
+        request.query_params, queryset=queryset, request=request
+    )
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs
+
+
+def get_latest_recipes(recipes_limit):
+    """Последние рецепты авторов для Prefetch одним запросом."""
+
+    recipes = Recipe.objects.only(
+        'id', 'name', 'image', 'cooking_time', 'author'
+    )
+    try:
+        recipes_limit = int(recipes_limit)
+    except (TypeError, ValueError):
+        return recipes
+    if recipes_limit < 0:
+        return recipes
+    return recipes.filter(pk__in=Subquery(
+        Recipe.objects.filter(
+            author=OuterRef('author')
+        ).values('pk')[:recipes_limit]
+    ))
 
 
 class IngredientFilter(FilterSet):
@@ -0,0 +1,163 @@
+import math
+import re
+from collections import defaultdict
+from threading import Lock
+
+from django.db import connections, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Ln
+
+from recipes.constants import (
+    FUZZY_SEARCH_LIMIT,
+    FUZZY_SEARCH_THRESHOLD,
+    FUZZY_USAGE_WEIGHT,
+    NAME_CONST_CHAR,
+)
+from recipes.models import Change, Ingredient, RecipeIngredients
+from .catalog import get_catalog_version, invalidate_catalog
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def get_trigrams(text):
+    """Триграммы слов, как их строит pg_trgm."""
+
+    trigrams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        trigrams.update(
+            padded[start:start + 3] for start in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+def get_rank(similarity, usage_count):
+    return similarity * (1 + FUZZY_USAGE_WEIGHT * math.log1p(usage_count))
+
+
+class TrigramIndex:
+    """Триграммный индекс ингредиентов в памяти процесса."""
+
+    def __init__(self, ingredients):
+        self.entries = {}
+        self.postings = defaultdict(set)
+        for ingredient in ingredients:
+            trigrams = get_trigrams(ingredient.name)
+            self.entries[ingredient.pk] = (
+                ingredient, ingredient.name.lower(), trigrams
+            )
+            for trigram in trigrams:
+                self.postings[trigram].add(ingredient.pk)
+
+    def search(self, query, limit):
+        query_trigrams = get_trigrams(query)
+        prefix = query.lower()
+        candidates = set()
+        for trigram in query_trigrams:
+            candidates |= self.postings.get(trigram, set())
+        results = []
+        for pk in candidates:
+            ingredient, name, trigrams = self.entries[pk]
+            similarity = (
+                len(query_trigrams & trigrams)
+                / len(query_trigrams | trigrams)
+            )
+            is_prefix = name.startswith(prefix)
+            if is_prefix or similarity >= FUZZY_SEARCH_THRESHOLD:
+                results.append((
+                    not is_prefix,
+                    -get_rank(similarity, ingredient.usage_count),
+                    name,
+                    ingredient,
+                ))
+        results.sort(key=lambda result: result[:3])
+        return [result[3] for result in results[:limit]]
+
+
+trigram_index = None
+trigram_index_version = None
+trigram_index_lock = Lock()
+
+
+def get_trigram_index(rebuild=False):
+    """Индекс пересобирается при смене версии справочника."""
+
+    global trigram_index, trigram_index_version
+    version = get_catalog_version(Ingredient)
+    if rebuild or trigram_index_version != version:
+        with trigram_index_lock:
+            if rebuild or trigram_index_version != version:
+                trigram_index = TrigramIndex(Ingredient.objects.only(
+                    'id', 'name', 'measurement_unit', 'usage_count'
+                ))
+                trigram_index_version = version
+    return trigram_index
+
+
+def search_postgresql(query, limit):
+    """Один SELECT: порог оператора % задан в параметрах подключения."""
+
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    queryset = Ingredient.objects.annotate(
+        similarity=TrigramSimilarity('name', query),
+        is_prefix=Case(
+            When(name__istartswith=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    ).annotate(
+        rank=ExpressionWrapper(
+            F('similarity')
+            * (1 + FUZZY_USAGE_WEIGHT * Ln(F('usage_count') + 1)),
+            output_field=FloatField(),
+        )
+    ).filter(
+        Q(name__trigram_similar=query) | Q(name__istartswith=query)
+    ).order_by('-is_prefix', '-rank', 'name')
+    return list(queryset[:limit])
+
+
+def search_ingredients(query, limit=FUZZY_SEARCH_LIMIT):
+    """Ингредиенты, похожие на query, с учетом опечаток.
+
+    Сначала идут названия, начинающиеся с query, затем остальные
+    по похожести, умноженной на логарифм числа рецептов.
+    """
+
+    query = query.strip()[:NAME_CONST_CHAR]
+    if not get_trigrams(query):
+        return []
+    vendor = connections[router.db_for_read(Ingredient)].vendor
+    if vendor == 'postgresql':
+        return search_postgresql(query, limit)
+    return get_trigram_index().search(query, limit)
+
+
+def update_usage_counts():
+    """Пересчитывает число рецептов у каждого ингредиента."""
+
+    usage = RecipeIngredients.objects.filter(
+        ingredients=OuterRef('pk')
+    ).order_by().values('ingredients').annotate(
+        count=Count('id')
+    ).values('count')
+    with transaction.atomic():
+        updated = Ingredient.objects.update(
+            usage_count=Coalesce(Subquery(usage), 0)
+        )
+        Change.log(Ingredient, None, Change.UPDATE)
+    invalidate_catalog(Ingredient)
+    return updated
@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from api.benchmark import compare, run_benchmark, seed_dataset
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер p50/p95 и числа SQL-запросов для эндпоинтов API '
+        'на тестовой БД и сравнение с сохраненным baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Сохранить результаты как новый baseline'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20.0,
+            help='Допустимый рост p95 в процентах'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='*',
+            help='Имена эндпоинтов, например recipe-list'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with TemporaryDirectory() as media_root:
+                with override_settings(
+                    MEDIA_ROOT=media_root,
+                    REST_FRAMEWORK={
+                        **settings.REST_FRAMEWORK,
+                        'DEFAULT_THROTTLE_RATES': {},
+                    }
+                ):
+                    user = seed_dataset(
+                        users=options['users'], recipes=options['recipes']
+                    )
+                    results = run_benchmark(
+                        user,
+                        repeat=options['repeat'],
+                        only=options['only']
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        baseline_path = Path(options['baseline'])
+        baseline = {}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        lines, regressions = compare(results, baseline, options['tolerance'])
+        self.stdout.write('\n'.join(lines))
+
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(
+                json.dumps(results, indent=2, ensure_ascii=False),
+                encoding='utf-8'
+            )
+            self.stdout.write(f'Baseline сохранен в {baseline_path}')
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'Регрессии: {", ".join(regressions)}')
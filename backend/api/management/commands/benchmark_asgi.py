@@ -0,0 +1,100 @@
+import asyncio
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe
+
+from api.async_views import close_db_connections
+from api.benchmark import (
+    AsgiClient,
+    run_async_load,
+    run_sync_load,
+    seed_dataset,
+)
+from foodgram.asgi import application
+
+urlpatterns = [
+    path('api/', include('api.async_urls')),
+    path('api/', include('api.urls')),
+]
+
+LOAD_URLS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=12',
+    '/api/recipes/?is_favorited=1',
+    '/api/tags/',
+    '/api/ingredients/?name=мо',
+    '/api/ingredients/?search=мо',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение пропускной способности синхронного пути и async-вью '
+        'для горячих эндпоинтов чтения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--recipes', type=int, default=200)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    results = self.run_load(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f'{"path":<8}{"req/s":>10}{"p50":>10}{"p95":>10}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<8}{result["rps"]:>10.1f}'
+                f'{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+            )
+        speedup = results['async']['rps'] / results['sync']['rps']
+        self.stdout.write(f'Ускорение: {speedup:.2f}x')
+
+    def run_load(self, options):
+        user = seed_dataset(recipes=options['recipes'])
+        token = Token.objects.create(user=user)
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:3])
+        urls = LOAD_URLS + (
+            f'/api/recipes/{recipe_ids[0]}/',
+            '/api/recipes/?ids=' + ','.join(map(str, recipe_ids)),
+            f'/api/ingredients/{Ingredient.objects.first().id}/',
+        )
+        sync_result = run_sync_load(
+            lambda: Client(HTTP_AUTHORIZATION=f'Token {token.key}'),
+            urls,
+            options['requests'],
+            options['concurrency']
+        )
+        with override_settings(ROOT_URLCONF=__name__):
+            try:
+                async_result = asyncio.run(run_async_load(
+                    AsgiClient(application),
+                    urls,
+                    options['requests'],
+                    options['concurrency'],
+                    AUTHORIZATION=f'Token {token.key}'
+                ))
+            finally:
+                close_db_connections()
+        return {'sync': sync_result, 'async': async_result}
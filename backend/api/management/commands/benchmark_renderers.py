@@ -0,0 +1,84 @@
+from statistics import median
+from time import perf_counter
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import renderers
+from api.serializers import IngredientSerializer, RecipeReadSerializer
+from api.views import IngredientViewSet, RecipeViewSet
+
+
+def get_renderers():
+    """Доступные рендереры: DRF, orjson и MessagePack, если установлены."""
+
+    available = {'drf-json': JSONRenderer()}
+    if renderers.orjson is not None:
+        available['orjson'] = renderers.FastJSONRenderer()
+    if renderers.msgpack is not None:
+        available['msgpack'] = renderers.MessagePackRenderer()
+    return available
+
+
+class Command(BaseCommand):
+    help = (
+        'Время кодирования и размер ответа для страниц ленты '
+        'и полного списка ингредиентов на данных текущей БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        payloads = self.get_payloads(options)
+        if not payloads:
+            raise CommandError(
+                'В БД нет рецептов: заполните ее командой seed_data'
+            )
+        available = get_renderers()
+        self.stdout.write(
+            f'{"payload":<20}{"renderer":<12}{"ms":>10}{"bytes":>12}'
+        )
+        for name, data in payloads.items():
+            for renderer_name, renderer in available.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    start = perf_counter()
+                    content = renderer.render(data)
+                    timings.append(perf_counter() - start)
+                self.stdout.write(
+                    f'{name:<20}{renderer_name:<12}'
+                    f'{median(timings) * 1000:>10.3f}{len(content):>12}'
+                )
+
+    @staticmethod
+    def get_payloads(options):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        context = {
+            'request': request,
+            'favorited_ids': set(),
+            'cart_ids': set(),
+            'subscribed_ids': set(),
+        }
+        limit = options['limit']
+        payloads = {}
+        for page in range(options['pages']):
+            recipes = RecipeViewSet.queryset.all()[
+                page * limit:(page + 1) * limit
+            ]
+            data = RecipeReadSerializer(
+                recipes, many=True, context=context
+            ).data
+            if not data:
+                break
+            payloads[f'recipes page {page + 1}'] = data
+        if payloads:
+            payloads['ingredients'] = IngredientSerializer(
+                IngredientViewSet.queryset.all(), many=True
+            ).data
+        return payloads
@@ -0,0 +1,52 @@
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from api.query_budgets import check_budgets
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка бюджетов SQL-запросов для всех маршрутов API '
+        'на двух объемах данных в тестовой БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='*',
+            help='Имена кейсов, например recipe-list-auth'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with TemporaryDirectory() as media_root:
+                with override_settings(
+                    MEDIA_ROOT=media_root,
+                    SHOPPING_LIST_ROOT=media_root,
+                    REST_FRAMEWORK={
+                        **settings.REST_FRAMEWORK,
+                        'DEFAULT_THROTTLE_RATES': {},
+                    }
+                ):
+                    lines, failures = check_budgets(only=options['only'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('\n'.join(lines))
+        if failures:
+            raise CommandError(
+                'Превышены бюджеты SQL-запросов:\n' + '\n'.join(failures)
+            )
@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+STARTUP_SCRIPT = '''
+import json
+from time import perf_counter
+
+start = perf_counter()
+from django.apps.config import AppConfig
+
+ready_times = {}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    app_config = create(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        ready_start = perf_counter()
+        ready()
+        ready_times[app_config.name] = perf_counter() - ready_start
+
+    app_config.ready = timed_ready
+    return app_config
+
+
+AppConfig.create = classmethod(timed_create)
+
+import django
+django.setup()
+setup_done = perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print(json.dumps({
+    'setup': setup_done - start,
+    'total': perf_counter() - start,
+    'ready': ready_times,
+}))
+'''
+
+
+def parse_importtime(output):
+    """Строки -X importtime: модуль -> (собственное, суммарное) в мс."""
+
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line.split(':', 1)[1].split('|')
+        modules[name.strip()] = (
+            int(self_time) / 1000,
+            int(cumulative) / 1000,
+        )
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Время импорта модулей и apps.ready() для INSTALLED_APPS '
+        'при холодном старте в отдельном процессе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            help='Ошибка, если старт приложения дольше бюджета'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        }
+        process = subprocess.run(
+            (sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT),
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr)
+        timings = json.loads(process.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(process.stderr)
+
+        self.stdout.write(
+            f'django.setup(): {timings["setup"] * 1000:.1f}ms, '
+            f'WSGI + URLconf: {timings["total"] * 1000:.1f}ms'
+        )
+        self.stdout.write('\nИмпорт и ready() приложений, мс:')
+        for app in settings.INSTALLED_APPS:
+            name = app.split('.apps.')[0]
+            import_ms = sum(
+                self_ms for module, (self_ms, _) in modules.items()
+                if module == name or module.startswith(f'{name}.')
+            )
+            ready_ms = timings['ready'].get(name, 0) * 1000
+            self.stdout.write(
+                f'  {name:<32}{import_ms:>9.1f}{ready_ms:>9.1f}'
+            )
+
+        packages = defaultdict(float)
+        for name, (self_ms, _) in modules.items():
+            packages[name.split('.')[0]] += self_ms
+        self.stdout.write('\nПакеты по собственному времени импорта, мс:')
+        for name, total in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[:options['top']]:
+            self.stdout.write(f'  {name:<32}{total:>9.1f}')
+
+        self.stdout.write('\nМодули по суммарному времени импорта, мс:')
+        for name, (_, cumulative) in sorted(
+            modules.items(), key=lambda item: item[1][1], reverse=True
+        )[:options['top']]:
+            self.stdout.write(f'  {name:<48}{cumulative:>9.1f}')
+
+        budget = options['budget_ms']
+        if budget is not None and timings['total'] * 1000 > budget:
+            raise CommandError(
+                f'Старт {timings["total"] * 1000:.1f}ms превышает '
+                f'бюджет {budget:.0f}ms'
+            )
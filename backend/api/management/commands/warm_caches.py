@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from time import perf_counter
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.warmup import get_warm_up_host, get_warm_up_jobs, render_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогрев общего кэша (CACHE_LOCATION) и БД: справочники '
+        'и первые страницы анонимной ленты для самых частых наборов тегов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_UP_PAGES
+        )
+        parser.add_argument(
+            '--limit', type=int, default=settings.REST_FRAMEWORK['PAGE_SIZE']
+        )
+        parser.add_argument(
+            '--combinations',
+            type=int,
+            default=settings.WARM_UP_COMBINATIONS,
+            help='Сколько наборов тегов прогревать'
+        )
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=settings.WARM_UP_SAMPLE,
+            help='Сколько последних рецептов смотреть для наборов тегов'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--host',
+            default=get_warm_up_host(),
+            help='Host для ссылок пагинации, должен быть в ALLOWED_HOSTS'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not settings.CACHE_LOCATION:
+            self.stderr.write(
+                'CACHE_LOCATION не задан: кэш этого процесса не виден '
+                'воркерам, прогреется только БД. Воркеры прогревает '
+                'мастер-процесс gunicorn при старте.'
+            )
+        start = perf_counter()
+        jobs = get_warm_up_jobs(
+            options['combinations'],
+            options['pages'],
+            options['limit'],
+            options['sample'],
+        )
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(
+                lambda job: render_job(options['host'], *job), jobs
+            ))
+
+        failed = []
+        for name, status_code, duration in results:
+            self.stdout.write(f'{name:<60}{status_code:>5}{duration:>10.1f}ms')
+            if status_code != 200:
+                failed.append(name)
+        durations = [duration for _, _, duration in results]
+        self.stdout.write(
+            f'Прогрето {len(results)} ответов за '
+            f'{(perf_counter() - start) * 1000:.0f}ms, '
+            f'p50 {median(durations):.1f}ms, max {max(durations):.1f}ms'
+        )
+        if failed:
+            raise CommandError(f'Ошибки прогрева: {", ".join(failed)}')
@@ -0,0 +1,98 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+request_latency = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса',
+    ('route', 'method'),
+)
+request_count = Counter(
+    'foodgram_requests',
+    'Запросы по статусу ответа',
+    ('route', 'method', 'status'),
+)
+request_queries = Histogram(
+    'foodgram_request_db_queries',
+    'Число SQL-запросов на запрос',
+    ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+cache_requests = Counter(
+    'foodgram_cache_requests',
+    'Обращения к кэшам приложения',
+    ('cache', 'result'),
+)
+
+
+def record_cache(name, hit):
+    cache_requests.labels(name, 'hit' if hit else 'miss').inc()
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов запроса, активный внутри count_queries()."""
+
+    def __init__(self):
+        self.count = 0
+
+
+current_counter = ContextVar('current_counter', default=None)
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы текущего контекста.
+
+    Контекст переходит в потоки sync_to_async, поэтому учитываются
+    и запросы async-вью из пула потоков БД.
+    """
+
+    counter = QueryCounter()
+    token = current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        current_counter.reset(token)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = current_counter.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection):
+    """Ставится на каждое новое подключение любого потока."""
+
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def get_registry():
+    """Реестр метрик: общий для воркеров gunicorn или процесса."""
+
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    """Метрики в текстовом формате Prometheus."""
+
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
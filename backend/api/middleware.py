@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db_router import check_connections, replica_reads
+from .metrics import (
+    count_queries,
+    request_count,
+    request_latency,
+    request_queries,
+)
+from .profiling import install_serializer_timer, profile_request
+
+slow_request_logger = logging.getLogger('foodgram.slow_requests')
+
+
+def get_view_action(request, view_func):
+    """Имя вида ViewSet.action для вьюсетов DRF."""
+
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class HybridMiddleware:
+    """Middleware для WSGI и ASGI без переключения между потоками.
+
+    Под ASGI вызывается __acall__, как в MiddlewareMixin Django.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.handle(request)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Время, статус и число SQL-запросов по имени маршрута."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        start = perf_counter()
+        with count_queries() as counter:
+            response = self.get_response(request)
+        self.observe(request, response, perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        with count_queries() as counter:
+            response = await self.get_response(request)
+        self.observe(request, response, perf_counter() - start, counter)
+        return response
+
+    @staticmethod
+    def observe(request, response, duration, counter):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.url_name if resolver_match else None
+        route = route or 'unmatched'
+        request_latency.labels(route, request.method).observe(duration)
+        request_count.labels(
+            route, request.method, response.status_code
+        ).inc()
+        request_queries.labels(route).observe(counter.count)
+
+
+class ProfilingMiddleware:
+    """Замер SQL, сериализации и времени view с заголовком Server-Timing."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        install_serializer_timer()
+
+    def __call__(self, request):
+        start = perf_counter()
+        with profile_request() as profile:
+            request.profile = profile
+            response = self.get_response(request)
+        total = perf_counter() - start
+        if profile.view_started is not None:
+            profile.view_time = perf_counter() - profile.view_started
+        response['Server-Timing'] = (
+            f'{profile.server_timing()}, total;dur={total * 1000:.1f}'
+        )
+        if total >= self.threshold:
+            self.log_slow_request(request, profile, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = request.profile
+        profile.action = get_view_action(request, view_func)
+        profile.view_started = perf_counter()
+
+    @staticmethod
+    def log_slow_request(request, profile, total):
+        top_queries = '\n'.join(
+            f'  {count}x {duration * 1000:.1f}ms {sql}'
+            for sql, count, duration in profile.top_queries()
+        )
+        slow_request_logger.warning(
+            'Медленный запрос %s %s (%s): %.1fms, %d SQL за %.1fms\n%s',
+            request.method,
+            request.get_full_path(),
+            profile.action,
+            total * 1000,
+            profile.query_count,
+            profile.db_time * 1000,
+            top_queries,
+        )
+
+
+class DatabaseRoutingMiddleware(HybridMiddleware):
+    """Проверка подключений и чтение с реплик для безопасных API-запросов."""
+
+    @staticmethod
+    def use_replicas(request):
+        return (request.method in SAFE_METHODS
+                and request.path.startswith('/api/'))
+
+    def handle(self, request):
+        if settings.DB_CONN_HEALTH_CHECKS:
+            check_connections()
+        if self.use_replicas(request):
+            with replica_reads():
+                return self.get_response(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if settings.DB_CONN_HEALTH_CHECKS:
+            await sync_to_async(check_connections)()
+        if self.use_replicas(request):
+            with replica_reads():
+                return await self.get_response(request)
+        return await self.get_response(request)
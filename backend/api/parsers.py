@@ -0,0 +1,45 @@
+import json
+
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+
+class MultiPartData(dict):
+    """Поля multipart, к которым Request DRF добавляет файлы.
+
+    DRF объединяет данные и файлы через copy() и update(), а обычный
+    dict.update взял бы из MultiValueDict списки вместо файлов.
+    """
+
+    def copy(self):
+        return MultiPartData(self)
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, MultiValueDict):
+            other = other.dict()
+        super().update(other, **kwargs)
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """multipart/form-data, где вложенные поля переданы строками JSON.
+
+    Имена таких полей берутся из view.multipart_json_fields, файлы
+    обрабатываются загрузчиками Django из FILE_UPLOAD_HANDLERS.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        json_fields = getattr(
+            parser_context['view'], 'multipart_json_fields', ()
+        )
+        data = MultiPartData()
+        for key, value in result.data.items():
+            if key not in json_fields:
+                data[key] = value
+                continue
+            try:
+                data[key] = json.loads(value)
+            except ValueError:
+                raise ParseError(f'Поле {key} должно быть строкой JSON.')
+        return DataAndFiles(data, result.files)
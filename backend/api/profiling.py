@@ -0,0 +1,106 @@
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """Накопитель метрик одного запроса: SQL, сериализация, view."""
+
+    def __init__(self):
+        self.queries = []
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+        self.view_started = None
+        self.view_time = 0.0
+        self.action = None
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def top_queries(self, limit=5):
+        """Самые дорогие SQL-запросы, сгруппированные по тексту."""
+
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, duration in self.queries:
+            grouped[sql][0] += 1
+            grouped[sql][1] += duration
+        return sorted(
+            ((sql, count, duration)
+             for sql, (count, duration) in grouped.items()),
+            key=lambda item: item[2],
+            reverse=True
+        )[:limit]
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.query_count} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+        ))
+
+
+class QueryRecorder:
+    """Обертка для connection.execute_wrapper, считающая время запросов."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.queries.append((sql, perf_counter() - start))
+
+
+@contextmanager
+def profile_request():
+    """Включает сбор метрик на всех подключениях к БД."""
+
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    recorder = QueryRecorder(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield profile
+    finally:
+        current_profile.reset(token)
+
+
+def _timed_data(fget):
+    def data(serializer):
+        profile = current_profile.get()
+        if profile is None:
+            return fget(serializer)
+        profile.serialize_depth += 1
+        start = perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            profile.serialize_depth -= 1
+            if not profile.serialize_depth:
+                profile.serialize_time += perf_counter() - start
+    data.profiled = True
+    return data
+
+
+def install_serializer_timer():
+    """Подменяет BaseSerializer.data, чтобы замерять сериализацию."""
+
+    fget = BaseSerializer.data.fget
+    if not getattr(fget, 'profiled', False):
+        BaseSerializer.data = property(_timed_data(fget))
@@ -0,0 +1,360 @@
+import traceback
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.urls import URLResolver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Cart, Favorite, Recipe
+from user.models import Subscribe
+from . import urls as api_urls
+from .benchmark import BENCHMARK_PASSWORD, BenchmarkContext, seed_dataset
+from .catalog import CATALOG_MODELS, invalidate_catalog
+from .ingredient_search import get_trigram_index
+from .registry import ingredient_registry, tag_registry
+from .shopping_list import READY, get_cart_version, get_job_paths
+
+DatasetSize = namedtuple('DatasetSize', ('users', 'recipes', 'limit'))
+
+DATASET_SIZES = (
+    DatasetSize(users=20, recipes=30, limit=6),
+    DatasetSize(users=60, recipes=120, limit=24),
+)
+
+BudgetCase = namedtuple(
+    'BudgetCase',
+    ('name', 'route', 'budget', 'method', 'url', 'data', 'auth', 'status',
+     'cleanup'),
+    defaults=(None, True, (200, 201, 202, 204), None)
+)
+
+QueryRecord = namedtuple('QueryRecord', ('sql', 'location'))
+
+
+def get_api_routes(patterns=None):
+    """Имена всех маршрутов из api/urls.py."""
+
+    if patterns is None:
+        patterns = api_urls.urlpatterns
+    routes = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            routes |= get_api_routes(pattern.url_patterns)
+        elif pattern.name:
+            routes.add(pattern.name)
+    return routes
+
+
+def get_location():
+    """Ближайшие к запросу кадры стека из кода проекта."""
+
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith('query_budgets.py')
+    ]
+    return ' <- '.join(
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} '
+        f'in {frame.name}'
+        for frame in reversed(frames[-3:])
+    )
+
+
+class QueryLog:
+    """Обертка для connection.execute_wrapper: SQL и место вызова."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.records.append(QueryRecord(sql, get_location()))
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """Одинаковые SQL, выполненные больше одного раза."""
+
+        counts = Counter(self.records)
+        return sorted(
+            ((count, record) for record, count in counts.items()
+             if count > 1),
+            key=lambda item: item[0],
+            reverse=True
+        )
+
+
+def get_budget_cases(context):
+    """Бюджеты SQL-запросов для каждого маршрута из api/urls.py.
+
+    Бюджет не зависит от размера страницы и объема данных:
+    {limit} в адресе подставляется из DATASET_SIZES.
+    """
+
+    user = context.user
+    recipe_id = context.recipe.id
+    own_recipe_id = context.own_recipe.id
+    author_id = context.author.id
+
+    def pdf_job_url(suffix=''):
+        """Готовый PDF, чтобы не запускать фоновый рендер."""
+
+        def url():
+            job_id = get_cart_version(user)
+            path = get_job_paths(user, job_id)[READY]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'%PDF-1.4')
+            if suffix is None:
+                return '/api/recipes/shopping_cart_pdf/'
+            return f'/api/recipes/shopping_cart_pdf/{job_id}/{suffix}'
+        return url
+
+    def restore_token(response):
+        Token.objects.create(key=context.token_key, user=user)
+
+    def restore_email(response):
+        type(user).objects.filter(pk=user.pk).update(email=user.email)
+
+    return (
+        BudgetCase('recipe-list', 'recipe-list', 6, 'get',
+                   '/api/recipes/?limit={limit}', auth=False),
+        BudgetCase('recipe-list-auth', 'recipe-list', 10, 'get',
+                   '/api/recipes/?limit={limit}'),
+        BudgetCase('recipe-list-filters', 'recipe-list', 11, 'get',
+                   f'/api/recipes/?limit={{limit}}&is_favorited=1'
+                   f'&tags={context.tag.slug}'),
+        BudgetCase('recipe-list-ids', 'recipe-list', 7, 'get',
+                   lambda: '/api/recipes/?ids=' + ','.join(
+                       str(pk) for pk in
+                       Recipe.objects.values_list('id', flat=True)[:24]
+                   )),
+        BudgetCase('recipe-detail', 'recipe-detail', 7, 'get',
+                   f'/api/recipes/{recipe_id}/'),
+        BudgetCase('recipe-create', 'recipe-list', 16, 'post',
+                   '/api/recipes/', data=context.recipe_payload,
+                   cleanup=lambda response: Recipe.objects.filter(
+                       id=response.json()['id']).delete()),
+        BudgetCase('recipe-update', 'recipe-detail', 19, 'patch',
+                   f'/api/recipes/{own_recipe_id}/',
+                   data=context.recipe_payload),
+        BudgetCase('recipe-favorite', 'recipe-favorite', 4, 'post',
+                   f'/api/recipes/{recipe_id}/favorite/',
+                   cleanup=lambda response: Favorite.objects.filter(
+                       user=user, recipe_id=recipe_id).delete()),
+        BudgetCase('recipe-shopping-cart', 'recipe-shopping-cart', 4,
+                   'post', f'/api/recipes/{recipe_id}/shopping_cart/',
+                   cleanup=lambda response: Cart.objects.filter(
+                       user=user, recipe_id=recipe_id).delete()),
+        BudgetCase('recipe-download-shopping-cart',
+                   'recipe-download-shopping-cart', 1, 'get',
+                   '/api/recipes/download_shopping_cart/'),
+        BudgetCase('recipe-shopping-cart-pdf', 'recipe-shopping-cart-pdf',
+                   1, 'post', pdf_job_url(None)),
+        BudgetCase('recipe-shopping-cart-pdf-status',
+                   'recipe-shopping-cart-pdf-status', 0, 'get',
+                   pdf_job_url()),
+        BudgetCase('recipe-shopping-cart-pdf-download',
+                   'recipe-shopping-cart-pdf-download', 0, 'get',
+                   pdf_job_url('download/')),
+        BudgetCase('recipe-export', 'recipe-export', 6, 'get',
+                   '/api/recipes/export/'),
+        BudgetCase('tag-list', 'tag-list', 1, 'get', '/api/tags/',
+                   auth=False),
+        BudgetCase('tag-detail', 'tag-detail', 1, 'get',
+                   f'/api/tags/{context.tag.id}/', auth=False),
+        BudgetCase('ingredient-list', 'ingredient-list', 1, 'get',
+                   '/api/ingredients/', auth=False),
+        BudgetCase('ingredient-list-name', 'ingredient-list', 1, 'get',
+                   '/api/ingredients/?name=мо', auth=False),
+        BudgetCase('ingredient-list-search', 'ingredient-list', 1, 'get',
+                   '/api/ingredients/?search=малако', auth=False),
+        BudgetCase('ingredient-detail', 'ingredient-detail', 1, 'get',
+                   f'/api/ingredients/{context.ingredients[0].id}/',
+                   auth=False),
+        BudgetCase('user-list', 'user-list', 3, 'get',
+                   '/api/users/?limit={limit}'),
+        BudgetCase('user-detail', 'user-detail', 2, 'get',
+                   f'/api/users/{author_id}/'),
+        BudgetCase('user-me', 'user-me', 1, 'get', '/api/users/me/'),
+        BudgetCase('user-subscriptions', 'user-subscriptions', 4, 'get',
+                   '/api/users/subscriptions/?limit={limit}'
+                   '&recipes_limit=3'),
+        BudgetCase('user-subscribe', 'user-subscribe', 6, 'post',
+                   f'/api/users/{author_id}/subscribe/',
+                   cleanup=lambda response: Subscribe.objects.filter(
+                       user=user, author_id=author_id).delete()),
+        BudgetCase('user-set-password', 'user-set-password', 2, 'post',
+                   '/api/users/set_password/',
+                   data={'current_password': BENCHMARK_PASSWORD,
+                         'new_password': BENCHMARK_PASSWORD}),
+        BudgetCase('user-set-username', 'user-set-username', 4, 'post',
+                   '/api/users/set_email/',
+                   data={'current_password': BENCHMARK_PASSWORD,
+                         'new_email': 'budget@example.com'},
+                   cleanup=restore_email),
+        BudgetCase('user-activation', 'user-activation', 1, 'post',
+                   '/api/users/activation/',
+                   data={'uid': 'MQ', 'token': 'invalid'},
+                   auth=False, status=(400, 403)),
+        BudgetCase('user-resend-activation', 'user-resend-activation', 1,
+                   'post', '/api/users/resend_activation/',
+                   data={'email': user.email}, auth=False,
+                   status=(204, 400)),
+        BudgetCase('user-reset-password', 'user-reset-password', 1, 'post',
+                   '/api/users/reset_password/',
+                   data={'email': 'nobody@example.com'}, auth=False),
+        BudgetCase('user-reset-password-confirm',
+                   'user-reset-password-confirm', 1, 'post',
+                   '/api/users/reset_password_confirm/',
+                   data={'uid': 'MQ', 'token': 'invalid',
+                         'new_password': BENCHMARK_PASSWORD},
+                   auth=False, status=(400,)),
+        BudgetCase('user-reset-username', 'user-reset-username', 1, 'post',
+                   '/api/users/reset_email/',
+                   data={'email': 'nobody@example.com'}, auth=False),
+        BudgetCase('user-reset-username-confirm',
+                   'user-reset-username-confirm', 2, 'post',
+                   '/api/users/reset_email_confirm/',
+                   data={'uid': 'MQ', 'token': 'invalid',
+                         'new_email': 'budget@example.com'},
+                   auth=False, status=(400,)),
+        BudgetCase('change-list', 'change-list', 1, 'get',
+                   '/api/changes/?since=0&limit={limit}', auth=False),
+        BudgetCase('api-root', 'api-root', 0, 'get', '/api/', auth=False),
+        BudgetCase('login', 'login', 4, 'post', '/api/auth/token/login/',
+                   data={'email': user.email,
+                         'password': BENCHMARK_PASSWORD},
+                   auth=False),
+        BudgetCase('logout', 'logout', 3, 'post', '/api/auth/token/logout/',
+                   cleanup=restore_token),
+    )
+
+
+def run_case(case, client, limit):
+    """Выполняет запрос и возвращает журнал его SQL-запросов."""
+
+    url = case.url() if callable(case.url) else case.url
+    data = case.data() if callable(case.data) else case.data
+    request = getattr(client, case.method)
+    log = QueryLog()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        if data is None:
+            response = request(url.format(limit=limit))
+        else:
+            response = request(
+                url.format(limit=limit), data,
+                content_type='application/json'
+            )
+        if response.streaming:
+            b''.join(response.streaming_content)
+    if response.status_code not in case.status:
+        raise RuntimeError(
+            f'{case.name}: {response.status_code} '
+            f'{response.content[:200]!r}'
+        )
+    if case.cleanup:
+        case.cleanup(response)
+    return log
+
+
+def load_catalog_indexes():
+    """Индексы справочников в памяти процесса, загруженные заново.
+
+    Это разовая стоимость процесса, а не запроса. После отката набора
+    id журнала на SQLite повторяются, и версия справочника может
+    совпасть с прошлым прогоном при других данных.
+    """
+
+    for model in CATALOG_MODELS:
+        invalidate_catalog(model)
+    tag_registry.reload()
+    ingredient_registry.reload()
+    get_trigram_index(rebuild=True)
+
+
+def run_dataset(size, only=None):
+    """Журналы запросов всех кейсов на одном наборе данных.
+
+    Набор создается в транзакции и откатывается после замера,
+    кэши очищаются, чтобы оба прогона начинались одинаково.
+    Версии справочников на время замера не перепроверяются,
+    чтобы число запросов не зависело от времени.
+    """
+
+    for cache in caches.all():
+        cache.clear()
+    logs = {}
+    pinned_versions = override_settings(
+        CATALOG_VERSION_CHECK_INTERVAL=float('inf')
+    )
+    with pinned_versions, transaction.atomic():
+        user = seed_dataset(users=size.users, recipes=size.recipes)
+        load_catalog_indexes()
+        context = BenchmarkContext(user)
+        token, _ = Token.objects.get_or_create(user=user)
+        context.token_key = token.key
+        auth_client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anon_client = Client()
+        cases = get_budget_cases(context)
+        for case in cases:
+            if only and case.name not in only:
+                continue
+            client = auth_client if case.auth else anon_client
+            logs[case.name] = run_case(case, client, size.limit)
+        transaction.set_rollback(True)
+    return cases, logs
+
+
+def check_budgets(only=None):
+    """Строки отчета и список провалов для всех бюджетов."""
+
+    runs = [run_dataset(size, only) for size in DATASET_SIZES]
+    cases = runs[0][0]
+    lines = [
+        f'{"case":<36}'
+        + ''.join(f'{f"q@{size.recipes}":>8}' for size in DATASET_SIZES)
+        + f'{"budget":>8}'
+    ]
+    failures = []
+    missing = set() if only else (
+        get_api_routes() - {case.route for case in cases}
+    )
+    for route in sorted(missing):
+        failures.append(f'{route}: маршрут без бюджета')
+    for case in cases:
+        if only and case.name not in only:
+            continue
+        logs = [run_logs[case.name] for _, run_logs in runs]
+        counts = [len(log.records) for log in logs]
+        line = f'{case.name:<36}' + ''.join(
+            f'{count:>8}' for count in counts
+        ) + f'{case.budget:>8}'
+        problems = []
+        if max(counts) > case.budget:
+            problems.append(f'больше бюджета {case.budget}')
+        if len(set(counts)) > 1:
+            problems.append('растет с объемом данных')
+        if problems:
+            line += '  <-- ' + ', '.join(problems)
+            failures.append(
+                f'{case.name}: {", ".join(problems)}\n'
+                + format_repeated(logs[-1])
+            )
+        lines.append(line)
+    return lines, failures
+
+
+def format_repeated(log):
+    repeated = log.repeated()
+    if not repeated:
+        return '  повторяющихся запросов нет'
+    return '\n'.join(
+        f'  {count}x {record.sql}\n     at {record.location}'
+        for count, record in repeated
+    )
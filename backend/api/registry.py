@@ -0,0 +1,94 @@
+from collections import defaultdict, namedtuple
+from threading import Lock
+
+from foodgram.db_router import primary_reads
+from recipes.models import Ingredient, Recipe, RecipeIngredients, Tag
+from .catalog import get_catalog_version
+
+TagRecord = namedtuple('TagRecord', ('id', 'name', 'color', 'slug'))
+IngredientRecord = namedtuple(
+    'IngredientRecord', ('id', 'name', 'measurement_unit')
+)
+
+
+class CatalogRegistry:
+    """Записи справочника в памяти процесса, по id.
+
+    Перечитываются целиком, когда меняется версия справочника
+    из get_catalog_version. Записи читаются с primary после версии,
+    чтобы отстающая реплика не подсунула старые данные под новую.
+    """
+
+    def __init__(self, model, record):
+        self.model = model
+        self.record = record
+        self.records = {}
+        self.version = None
+        self.lock = Lock()
+
+    def load(self, version):
+        with self.lock:
+            if self.version != version:
+                with primary_reads():
+                    self.records = {
+                        row[0]: self.record(*row)
+                        for row in self.model.objects.values_list(
+                            *self.record._fields
+                        )
+                    }
+                self.version = version
+        return self.records
+
+    def get_records(self):
+        version = get_catalog_version(self.model)
+        if self.version != version:
+            return self.load(version)
+        return self.records
+
+    def reload(self):
+        """Перечитывает записи, даже если версия не поменялась."""
+
+        self.version = None
+        return self.get_records()
+
+    def get_many(self, ids):
+        """Записи по id в исходном порядке, удаленные пропускаются."""
+
+        records = self.get_records()
+        if any(pk not in records for pk in ids):
+            records = self.reload()
+        return [records[pk] for pk in ids if pk in records]
+
+
+tag_registry = CatalogRegistry(Tag, TagRecord)
+ingredient_registry = CatalogRegistry(Ingredient, IngredientRecord)
+
+
+def load_catalog_links(recipes, tags=True, ingredients=True):
+    """Связи рецептов со справочниками: только id и количество.
+
+    Кладет в рецепт tag_ids и ingredient_amounts, названия
+    и остальные поля потом берутся из реестров.
+    """
+
+    recipes = {recipe.id: recipe for recipe in recipes}
+    if tags:
+        tag_ids = defaultdict(list)
+        for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+            recipe_id__in=recipes
+        ).values_list('recipe_id', 'tag_id'):
+            tag_ids[recipe_id].append(tag_id)
+        for recipe in recipes.values():
+            recipe.tag_ids = tag_ids[recipe.id]
+    if ingredients:
+        amounts = defaultdict(list)
+        for recipe_id, ingredient_id, amount in (
+            RecipeIngredients.objects.filter(
+                recipe_id__in=recipes
+            ).order_by('id').values_list(
+                'recipe_id', 'ingredients_id', 'amount'
+            )
+        ):
+            amounts[recipe_id].append((ingredient_id, amount))
+        for recipe in recipes.values():
+            recipe.ingredient_amounts = amounts[recipe.id]
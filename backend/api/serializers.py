@@ -1,10 +1,11 @@
+from django.db import models, transaction
 from rest_framework import serializers, status
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework.relations import PrimaryKeyRelatedField
 
 from recipes.constants import MAX_CONST_FOR_COOK, MIN_CONST_FOR_COOK
 from user.models import User, Subscribe
 from recipes.models import (
+    Change,
     Tag,
     Recipe,
     Ingredient,
@@ -12,6 +13,8 @@ from recipes.models import (
     Cart,
     Favorite,
 )
+from .fields import Base64ImageField
+from .registry import ingredient_registry, load_catalog_links, tag_registry
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -31,6 +34,9 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        subscribed_ids = self.context.get('subscribed_ids')
+        if subscribed_ids is not None:
+            return obj.id in subscribed_ids
         request = self.context['request']
         return (
             request and request.user.is_authenticated
@@ -51,7 +57,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
 
 
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
@@ -158,31 +164,30 @@ class SubcribeSerializer(serializers.ModelSerializer):
         return data
 
 
-class IngredientInfoSerializer(serializers.ModelSerializer):
-    """Сериализатор для представления ингридиентов в RecipeRead."""
-
-    id = serializers.IntegerField(source='ingredients.id', read_only=True)
-    name = serializers.CharField(source='ingredients.name', read_only=True)
-    measurement_unit = serializers.CharField(
-        source='ingredients.measurement_unit',
-        read_only=True
-    )
+class RecipeReadListSerializer(serializers.ListSerializer):
+    """Загружает связи со справочниками сразу для всей страницы."""
 
-    class Meta:
-        model = RecipeIngredients
-        fields = ('id', 'name', 'measurement_unit', 'amount')
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        recipes = list(data)
+        load_catalog_links(
+            recipes, 'tags' in self.child.fields,
+            'ingredients' in self.child.fields
+        )
+        return super().to_representation(recipes)
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Recipe на просмотр записей."""
+    """Сериализатор для модели Recipe на просмотр записей.
+
+    Теги и ингредиенты берутся из реестров справочников в памяти,
+    из базы читаются только id и количества.
+    """
 
-    tags = TagSerializer(read_only=True, many=True)
+    tags = serializers.SerializerMethodField()
     image = Base64ImageField()
-    ingredients = IngredientInfoSerializer(
-        many=True,
-        read_only=True,
-        source='recipeingredients'
-    )
+    ingredients = serializers.SerializerMethodField()
     author = UserSerializer(read_only=True)
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
@@ -201,8 +206,43 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time'
         )
+        list_serializer_class = RecipeReadListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested_fields = self.context.get('requested_fields')
+        if requested_fields is not None:
+            for name in set(self.fields) - requested_fields:
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        tags = 'tags' in self.fields and not hasattr(instance, 'tag_ids')
+        ingredients = (
+            'ingredients' in self.fields
+            and not hasattr(instance, 'ingredient_amounts')
+        )
+        if tags or ingredients:
+            load_catalog_links((instance,), tags, ingredients)
+        return super().to_representation(instance)
+
+    def get_tags(self, obj):
+        tags = sorted(
+            tag_registry.get_many(obj.tag_ids),
+            key=lambda tag: (tag.name, tag.id)
+        )
+        return [tag._asdict() for tag in tags]
+
+    def get_ingredients(self, obj):
+        amounts = dict(obj.ingredient_amounts)
+        return [
+            {**ingredient._asdict(), 'amount': amounts[ingredient.id]}
+            for ingredient in ingredient_registry.get_many(list(amounts))
+        ]
 
     def get_is_favorited(self, obj):
+        favorited_ids = self.context.get('favorited_ids')
+        if favorited_ids is not None:
+            return obj.id in favorited_ids
         request = self.context['request']
         return (
             request and request.user.is_authenticated
@@ -210,6 +250,9 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        cart_ids = self.context.get('cart_ids')
+        if cart_ids is not None:
+            return obj.id in cart_ids
         request = self.context['request']
         return (
             request and request.user.is_authenticated
@@ -292,6 +335,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredients.objects.bulk_create(ingredients_data)
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         tags = validated_data.pop('tags')
@@ -301,6 +345,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -351,3 +396,11 @@ class ShoppingCartSerializer(FavoriteShoppingCartSerializer):
     class Meta:
         model = Cart
         fields = ('user', 'recipe',)
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    """Сериализатор для журнала изменений."""
+
+    class Meta:
+        model = Change
+        fields = ('id', 'model', 'object_id', 'action', 'created_at')
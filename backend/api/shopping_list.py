@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F, Max, Sum
+
+from recipes.models import Cart, Ingredient, RecipeIngredients
+from .catalog import get_catalog_version
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+pdf_executor = ThreadPoolExecutor(
+    max_workers=settings.SHOPPING_LIST_PDF_THREADS,
+    thread_name_prefix='shopping-list-pdf'
+)
+logger = logging.getLogger('foodgram.shopping_list')
+
+
+def get_shopping_list(user):
+    """Ингредиенты корзины, сложенные по названию и единице измерения."""
+
+    return RecipeIngredients.objects.filter(
+        recipe__carts__user=user
+    ).values(
+        name=F('ingredients__name'),
+        measurement_unit=F('ingredients__measurement_unit')
+    ).annotate(
+        amount=Sum('amount')
+    ).order_by('name')
+
+
+def get_cart_version(user):
+    """Версия корзины: меняется при записи в Cart и правке рецептов в ней."""
+
+    state = Cart.objects.filter(user=user).aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        updated_at=Max('recipe__updated_at'),
+    )
+    state['ingredients'] = get_catalog_version(Ingredient)
+    return hashlib.sha1(
+        f'{user.pk}:{sorted(state.items())}'.encode()
+    ).hexdigest()
+
+
+def get_job_paths(user, job_id):
+    directory = Path(settings.SHOPPING_LIST_ROOT) / str(user.pk)
+    return {
+        READY: directory / f'{job_id}.pdf',
+        PENDING: directory / f'{job_id}.pending',
+        FAILED: directory / f'{job_id}.failed',
+    }
+
+
+def get_job_status(user, job_id):
+    paths = get_job_paths(user, job_id)
+    if paths[READY].exists():
+        return READY
+    if paths[FAILED].exists():
+        return FAILED
+    pending = paths[PENDING]
+    if (pending.exists() and time() - pending.stat().st_mtime
+            < settings.SHOPPING_LIST_PDF_TIMEOUT):
+        return PENDING
+    return None
+
+
+def start_job(user):
+    """Ставит рендер PDF в очередь, если для этой версии корзины его нет.
+
+    Файлы лежат на диске, поэтому готовый PDF отдает любой воркер,
+    а незавершенная задача считается потерянной через
+    SHOPPING_LIST_PDF_TIMEOUT секунд и запускается заново.
+    """
+
+    job_id = get_cart_version(user)
+    status = get_job_status(user, job_id)
+    if status in (READY, PENDING):
+        return job_id, status
+    paths = get_job_paths(user, job_id)
+    paths[PENDING].parent.mkdir(parents=True, exist_ok=True)
+    paths[FAILED].unlink(missing_ok=True)
+    paths[PENDING].touch()
+    pdf_executor.submit(run_job, user, job_id)
+    return job_id, PENDING
+
+
+def run_job(user, job_id):
+    paths = get_job_paths(user, job_id)
+    close_old_connections()
+    try:
+        temporary_path = paths[READY].with_suffix('.tmp')
+        render_pdf(list(get_shopping_list(user)), temporary_path)
+        os.replace(temporary_path, paths[READY])
+        for path in paths[READY].parent.glob('*.pdf'):
+            if path != paths[READY]:
+                path.unlink(missing_ok=True)
+    except Exception:
+        logger.exception('Shopping list PDF %s failed', job_id)
+        paths[FAILED].touch()
+    finally:
+        paths[PENDING].unlink(missing_ok=True)
+        close_old_connections()
+
+
+def render_pdf(ingredients, path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen.canvas import Canvas
+
+    font = 'ShoppingList'
+    if font not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(font, settings.SHOPPING_LIST_PDF_FONT)
+        )
+    width, height = A4
+    margin, line_height = 50, 18
+    canvas = Canvas(str(path), pagesize=A4)
+    canvas.setTitle('Список покупок')
+    canvas.setFont(font, 16)
+    canvas.drawString(margin, height - margin, 'Список покупок')
+    canvas.setFont(font, 12)
+    y = height - margin - 2 * line_height
+    for number, ingredient in enumerate(ingredients, start=1):
+        if y < margin:
+            canvas.showPage()
+            canvas.setFont(font, 12)
+            y = height - margin
+        canvas.drawString(
+            margin, y,
+            f'{number}. {ingredient["name"]} - '
+            f'{ingredient["amount"]} {ingredient["measurement_unit"]}'
+        )
+        y -= line_height
+    canvas.save()
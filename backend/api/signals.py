@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Tag
+from user.models import User
+from .authentication import invalidate_tokens
+from .catalog import invalidate_catalog
+from .metrics import install_query_counter
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Выход через djoser удаляет токен - убираем его из кэша.
+
+    После коммита: иначе другой процесс успеет снова положить
+    в кэш еще не удаленный токен.
+    """
+
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens((key,)))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Смена пароля, деактивация и правка профиля сбрасывают кэш."""
+
+    if not created:
+        keys = list(
+            Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
+        transaction.on_commit(lambda: invalidate_tokens(keys))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_changed_catalog(sender, **kwargs):
+    """Сброс после коммита, иначе реестр перечитает старые записи."""
+
+    transaction.on_commit(lambda: invalidate_catalog(sender))
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED:
+        install_query_counter(connection)
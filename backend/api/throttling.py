@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ActionRateThrottle(SimpleRateThrottle):
+    """Token bucket для дорогих действий вьюсета.
+
+    Действие ограничивается, если оно есть в view.throttle_scopes.
+    Запрос тратит view.get_throttle_cost(request) токенов, а бакет
+    пополняется равномерно со скоростью из DEFAULT_THROTTLE_RATES.
+    """
+
+    cache = caches[settings.THROTTLE_CACHE_ALIAS]
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    scope_suffix = ''
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scopes', {}).get(view.action)
+        if scope is None:
+            return True
+        self.scope = scope + self.scope_suffix
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        refill_rate = self.num_requests / self.duration
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(
+            self.num_requests, tokens + (now - updated) * refill_rate
+        )
+        cost = min(self.num_requests, self.get_cost(request, view))
+        if tokens < cost:
+            self.wait_time = (cost - tokens) / refill_rate
+            self.cache.set(self.key, (tokens, now), self.duration)
+            return False
+        self.cache.set(self.key, (tokens - cost, now), self.duration)
+        return True
+
+    @staticmethod
+    def get_cost(request, view):
+        get_throttle_cost = getattr(view, 'get_throttle_cost', None)
+        if get_throttle_cost is None:
+            return 1
+        return get_throttle_cost(request)
+
+    def wait(self):
+        return self.wait_time
+
+
+class ActionUserRateThrottle(ActionRateThrottle):
+    """Бакет на пользователя, анонимов не ограничивает."""
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': request.user.pk,
+        }
+
+
+class ActionIPRateThrottle(ActionRateThrottle):
+    """Бакет на IP-адрес, ставки из <scope>_ip."""
+
+    scope_suffix = '_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    ChangeViewSet,
     RecipeViewSet,
     TagViewSet,
     IngredientViewSet,
@@ -30,7 +32,15 @@ router_ver_1.register(
     UserViewSet,
     basename='user'
 )
+router_ver_1.register(
+    r'changes',
+    ChangeViewSet,
+    basename='change'
+)
 urlpatterns = [
     path('', include(router_ver_1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns.insert(0, path('', include('api.async_urls')))
@@ -1,30 +1,59 @@
 from collections import defaultdict
+from datetime import timedelta
 
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
-from django.db.models import Sum, Count, F
+from django.db.models import Sum, Count, F, Prefetch
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.viewsets import (
+    GenericViewSet,
+    ModelViewSet,
+    ReadOnlyModelViewSet,
+)
 from djoser.views import UserViewSet as UserViewSetBase
 
+from recipes.constants import (
+    CHANGES_PAGE_SIZE,
+    CHANGES_SETTLE_SECONDS,
+    MAX_CHANGES_PAGE_SIZE,
+    THROTTLE_BYTES_PER_TOKEN,
+    THROTTLE_RECIPES_PER_TOKEN,
+)
 from recipes.models import (
     Cart,
+    Change,
     Favorite,
     Ingredient,
-    Recipe,
     RecipeIngredients,
     Tag,
     User,
 )
 from user.models import Subscribe
-from .filter import IngredientFilter, RecipeFilter
+from .catalog import get_catalog, get_catalog_response
+from .conditional import get_detail_validators, get_list_validators
+from .export import stream_cookbook
+from .fieldsets import get_recipe_queryset, get_requested_fields
+from .filter import (
+    IngredientFilter,
+    RecipeFilter,
+    filter_queryset,
+    get_latest_recipes,
+    get_requested_ids,
+    get_user_flags,
+)
+from .ingredient_search import search_ingredients
 from .pagination import CustomPagination
+from .parsers import MultiPartJSONParser
 from .permission import IsAuthorOrAdminOrReadOnly
 from .serializers import (
+    ChangeSerializer,
     UserSerializer,
     FavoriteSerializer,
     IngredientSerializer,
@@ -35,6 +64,64 @@ from .serializers import (
     SubscriptionSerializer,
     TagSerializer,
 )
+from .shopping_list import (
+    READY,
+    get_job_paths,
+    get_job_status,
+    start_job,
+)
+from .throttling import ActionIPRateThrottle, ActionUserRateThrottle
+
+
+def get_ingredient_list_data(request):
+    """Найденные ингредиенты, None если нужен весь справочник."""
+
+    search = request.query_params.get('search')
+    if search:
+        ingredients = search_ingredients(search)
+    elif request.query_params.get('name'):
+        ingredients = filter_queryset(
+            IngredientFilter, Ingredient.objects.all(), request
+        )
+    else:
+        return None
+    return IngredientSerializer(ingredients, many=True).data
+
+
+def get_recipe_data(request, recipe, fields):
+    """Карточка рецепта с флагами пользователя."""
+
+    return RecipeReadSerializer(recipe, context={
+        'request': request,
+        'requested_fields': fields,
+        **get_user_flags(request.user, (recipe.id,)),
+    }).data
+
+
+def get_recipe_list_data(request, queryset, ids, paginator, fields):
+    """Страница рецептов или рецепты из ?ids= в порядке запроса.
+
+    Флаги пользователя читаются только для отданных рецептов,
+    по запросу на флаг.
+    """
+
+    page = None
+    if ids is None:
+        page = paginator.paginate_queryset(queryset, request)
+        recipes = list(queryset) if page is None else page
+    else:
+        found = queryset.in_bulk(ids)
+        recipes = [found[pk] for pk in ids if pk in found]
+    data = RecipeReadSerializer(recipes, many=True, context={
+        'request': request,
+        'requested_fields': fields,
+        **get_user_flags(
+            request.user, [recipe.id for recipe in recipes]
+        ),
+    }).data
+    if page is None:
+        return data
+    return paginator.get_paginated_response(data).data
 
 
 class IngredientViewSet(ReadOnlyModelViewSet):
@@ -47,6 +134,14 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        data = get_ingredient_list_data(request)
+        if data is not None:
+            return Response(data)
+        if request.accepted_renderer.format == 'json':
+            return get_catalog_response(Ingredient, request)
+        return Response(get_catalog(Ingredient))
+
 
 class TagViewSet(ReadOnlyModelViewSet):
     """Вывод тегов."""
@@ -56,23 +151,92 @@ class TagViewSet(ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(get_catalog(Tag))
+
 
 class RecipeViewSet(ModelViewSet):
     """Вывод рецептов."""
 
-    queryset = Recipe.objects.select_related(
-        'author'
-    ).prefetch_related('tags', 'ingredients')
+    queryset = get_recipe_queryset()
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     pagination_class = CustomPagination
     filterset_class = RecipeFilter
+    parser_classes = (JSONParser, MultiPartJSONParser)
+    multipart_json_fields = ('ingredients', 'tags')
+    throttle_classes = (ActionUserRateThrottle, ActionIPRateThrottle)
+    throttle_scopes = {
+        'create': 'recipe_write',
+        'update': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'download_shopping_cart': 'shopping_cart',
+        'shopping_cart_pdf': 'shopping_cart',
+        'export': 'export',
+    }
+
+    def get_requested_fields(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        return get_requested_fields(
+            self.request.query_params, RecipeReadSerializer.Meta.fields
+        )
+
+    def get_queryset(self):
+        requested_fields = self.get_requested_fields()
+        if requested_fields is None:
+            return super().get_queryset()
+        return get_recipe_queryset(requested_fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['requested_fields'] = self.get_requested_fields()
+        return context
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def get_throttle_cost(self, request):
+        """Большие картинки в base64 тратят больше токенов."""
+
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        return 1 + content_length // THROTTLE_BYTES_PER_TOKEN
+
+    def list(self, request, *args, **kwargs):
+        ids = get_requested_ids(request.query_params)
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = get_list_validators(
+            request, queryset, ids, self.paginator,
+            request.accepted_renderer.media_type
+        )
+        if validators is not None:
+            not_modified = validators.not_modified()
+            if not_modified is not None:
+                return not_modified
+        response = Response(get_recipe_list_data(
+            request, queryset, ids, self.paginator,
+            self.get_requested_fields()
+        ))
+        if validators is None:
+            return response
+        return validators.apply(response)
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = get_detail_validators(
+            request, self.get_queryset(), kwargs['pk'],
+            request.accepted_renderer.media_type
+        )
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+        return validators.apply(Response(get_recipe_data(
+            request, self.get_object(), self.get_requested_fields()
+        )))
+
     @staticmethod
     def create_instance(serializer_class, recipe_id, request):
         """Статический метод для создания записи."""
@@ -133,6 +297,82 @@ class RecipeViewSet(ModelViewSet):
         ] = 'attachment; filename="shopping_list.txt"'
         return response
 
+    def get_pdf_job(self, request, job_id, job_status):
+        job = {
+            'id': job_id,
+            'status': job_status,
+            'status_url': request.build_absolute_uri(reverse(
+                'recipe-shopping-cart-pdf-status', args=(job_id,)
+            )),
+        }
+        if job_status == READY:
+            job['download_url'] = request.build_absolute_uri(reverse(
+                'recipe-shopping-cart-pdf-download', args=(job_id,)
+            ))
+        return job
+
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_pdf(self, request):
+        """Запуск фонового рендера PDF со списком покупок."""
+
+        job_id, job_status = start_job(request.user)
+        return Response(
+            self.get_pdf_job(request, job_id, job_status),
+            status=(
+                status.HTTP_200_OK if job_status == READY
+                else status.HTTP_202_ACCEPTED
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path=r'shopping_cart_pdf/(?P<job_id>[0-9a-f]{40})',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_pdf_status(self, request, job_id):
+        job_status = get_job_status(request.user, job_id)
+        if job_status is None:
+            raise NotFound
+        return Response(self.get_pdf_job(request, job_id, job_status))
+
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path=r'shopping_cart_pdf/(?P<job_id>[0-9a-f]{40})/download',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_pdf_download(self, request, job_id):
+        path = get_job_paths(request.user, job_id)[READY]
+        try:
+            pdf_file = open(path, 'rb')
+        except FileNotFoundError:
+            raise NotFound
+        return FileResponse(
+            pdf_file,
+            as_attachment=True,
+            filename='shopping_list.pdf',
+            content_type='application/pdf'
+        )
+
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,)
+    )
+    def export(self, request):
+        """ZIP с рецептами пользователя и избранным, с картинками."""
+
+        response = StreamingHttpResponse(
+            stream_cookbook(request.user), content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="cookbook.zip"'
+        return response
+
     @action(
         detail=True,
         methods=('POST',),
@@ -194,12 +434,38 @@ class UserViewSet(UserViewSetBase):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = CustomPagination
+    throttle_classes = (ActionUserRateThrottle, ActionIPRateThrottle)
+    throttle_scopes = {'subscriptions': 'subscriptions'}
 
     def get_permissions(self):
         if self.action in ('me', 'subscribe', 'unsubscribe'):
             return (IsAuthenticated(),)
         return super().get_permissions()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        subscribed_ids = getattr(self, 'subscribed_ids', None)
+        if subscribed_ids is not None:
+            context['subscribed_ids'] = subscribed_ids
+        return context
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.request.user.is_authenticated:
+            self.subscribed_ids = set(Subscribe.objects.filter(
+                user=self.request.user, author__in=page
+            ).values_list('author_id', flat=True))
+        return page
+
+    def get_throttle_cost(self, request):
+        """Подписки с большим recipes_limit тратят больше токенов."""
+
+        try:
+            recipes_limit = int(request.query_params.get('recipes_limit', 0))
+        except ValueError:
+            recipes_limit = 0
+        return 1 + max(recipes_limit, 0) // THROTTLE_RECIPES_PER_TOKEN
+
     @action(
         detail=True,
         methods=('post',),
@@ -236,11 +502,55 @@ class UserViewSet(UserViewSetBase):
     def subscriptions(self, request):
         users = User.objects.filter(subscribing__user=request.user).annotate(
             recipes_count=Count('recipes')
-        )
+        ).prefetch_related(Prefetch(
+            'recipes', queryset=get_latest_recipes(
+                request.query_params.get('recipes_limit')
+            )
+        ))
         paginated_queryset = self.paginate_queryset(users)
         serializer = SubscriptionSerializer(
             paginated_queryset,
-            context={'request': request},
+            context=self.get_serializer_context(),
             many=True
         )
         return self.get_paginated_response(serializer.data)
+
+
+class ChangeViewSet(GenericViewSet):
+    """Изменения рецептов и справочников после курсора ?since=.
+
+    Id выдается при вставке, а не при коммите, поэтому отдаются только
+    записи старше CHANGES_SETTLE_SECONDS: более раннюю транзакцию
+    с меньшим id курсор иначе пропустил бы навсегда.
+    """
+
+    queryset = Change.objects.all()
+    serializer_class = ChangeSerializer
+    permission_classes = (AllowAny,)
+
+    def get_int_param(self, name, default):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'Ожидается целое число.'})
+        if value < 0:
+            raise ValidationError({name: 'Ожидается неотрицательное число.'})
+        return value
+
+    def list(self, request, *args, **kwargs):
+        since = self.get_int_param('since', 0)
+        limit = min(
+            self.get_int_param('limit', CHANGES_PAGE_SIZE) or 1,
+            MAX_CHANGES_PAGE_SIZE
+        )
+        settled = timezone.now() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+        changes = list(self.get_queryset().filter(
+            id__gt=since, created_at__lt=settled
+        )[:limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return Response({
+            'cursor': changes[-1].id if changes else since,
+            'has_more': has_more,
+            'results': self.get_serializer(changes, many=True).data,
+        })
@@ -0,0 +1,122 @@
+import logging
+from collections import Counter, defaultdict
+from threading import Event
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.template.response import SimpleTemplateResponse
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIRequestFactory
+
+from recipes.models import Recipe, Tag
+from .catalog import CATALOG_MODELS, get_catalog_payload
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+logger = logging.getLogger('foodgram.warmup')
+warmed_up = Event()
+
+
+def get_tag_combinations(count, sample):
+    """Наборы тегов для прогрева, самые частые первыми.
+
+    Без фильтра, все теги сразу (так ленту открывает фронтенд),
+    затем сочетания тегов у sample последних рецептов: первые
+    страницы ленты состоят из них, а вся таблица связей не нужна.
+    """
+
+    recent = Recipe.objects.order_by('-pub_date').values('id')[:sample]
+    recipe_tags = defaultdict(set)
+    for recipe_id, slug in Recipe.tags.through.objects.filter(
+        recipe_id__in=recent
+    ).values_list('recipe_id', 'tag__slug'):
+        recipe_tags[recipe_id].add(slug)
+    usage = Counter(tuple(sorted(slugs)) for slugs in recipe_tags.values())
+    combinations = [(), tuple(Tag.objects.values_list('slug', flat=True))]
+    for slugs, _ in usage.most_common():
+        if slugs not in combinations:
+            combinations.append(slugs)
+    return combinations[:count]
+
+
+def get_warm_up_jobs(combinations, pages, limit, sample):
+    """Справочники и первые страницы анонимной ленты."""
+
+    jobs = [
+        ('tags', TagViewSet, 'tag-list', {}),
+        ('ingredients', IngredientViewSet, 'ingredient-list', {}),
+    ]
+    for slugs in get_tag_combinations(combinations, sample):
+        for page in range(1, pages + 1):
+            params = {'tags': list(slugs), 'page': page, 'limit': limit}
+            name = f'recipes [{",".join(slugs) or "*"}] page {page}'
+            jobs.append((name, RecipeViewSet, 'recipe-list', params))
+    return jobs
+
+
+def get_warm_up_host():
+    """Host для ссылок пагинации, должен быть в ALLOWED_HOSTS."""
+
+    return next(
+        (host.strip() for host in settings.ALLOWED_HOSTS
+         if host.strip() and '*' not in host),
+        'localhost'
+    )
+
+
+def render_job(host, name, viewset, url_name, params):
+    view = viewset.as_view({'get': 'list'})
+    request = APIRequestFactory().get(
+        reverse(url_name),
+        params,
+        HTTP_HOST=host,
+        HTTP_ACCEPT='application/json'
+    )
+    start = perf_counter()
+    try:
+        response = view(request)
+        if isinstance(response, SimpleTemplateResponse):
+            response.render()
+    finally:
+        connections.close_all()
+    return name, response.status_code, (perf_counter() - start) * 1000
+
+
+def warm_up():
+    """Загружает URLconf, прогревает справочники и первые страницы ленты.
+
+    При preload_app вызывается в мастер-процессе gunicorn до fork,
+    поэтому справочники и реестры в памяти достаются всем воркерам,
+    а подключения к БД закрываются, чтобы воркеры их не делили.
+    Ошибка БД (например, до migrate) не роняет мастер-процесс:
+    прогрев прерывается, воркеры прогреются первыми запросами.
+    """
+
+    get_resolver().url_patterns
+    try:
+        for model in CATALOG_MODELS:
+            get_catalog_payload(model)
+        host = get_warm_up_host()
+        for job in get_warm_up_jobs(
+            settings.WARM_UP_COMBINATIONS,
+            settings.WARM_UP_PAGES,
+            settings.REST_FRAMEWORK['PAGE_SIZE'],
+            settings.WARM_UP_SAMPLE,
+        ):
+            name, status_code, _ = render_job(host, *job)
+            if status_code not in (200, 404):
+                logger.warning('Прогрев %s: ответ %s', name, status_code)
+    except DatabaseError:
+        logger.exception('Прогрев прерван: БД недоступна или не мигрирована')
+    finally:
+        connections.close_all()
+    warmed_up.set()
+
+
+def readiness(request):
+    """Готовность к трафику: 200 только после прогрева."""
+
+    if not warmed_up.is_set():
+        return JsonResponse({'ready': False}, status=503)
+    return JsonResponse({'ready': True})
@@ -0,0 +1,76 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+read_state = ContextVar('read_state', default=None)
+
+
+class ReadState:
+    """Состояние чтения запроса: выбранная реплика и факт записи."""
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+@contextmanager
+def replica_reads():
+    """Чтения внутри блока идут на одну из реплик до первой записи."""
+
+    token = read_state.set(
+        ReadState(random.choice(settings.DATABASE_REPLICAS))
+        if settings.DATABASE_REPLICAS else None
+    )
+    try:
+        yield
+    finally:
+        read_state.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Принудительное чтение с primary, например для свежих токенов."""
+
+    token = read_state.set(None)
+    try:
+        yield
+    finally:
+        read_state.reset(token)
+
+
+def check_connections():
+    """Закрывает открытые подключения, которые перестали отвечать."""
+
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+class PrimaryReplicaRouter:
+    """Чтения безопасных API-запросов - на реплики, записи - на primary."""
+
+    def db_for_read(self, model, **hints):
+        state = read_state.get()
+        if state is None or state.wrote:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = read_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
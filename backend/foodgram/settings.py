@@ -1,8 +1,12 @@
 import os
+from importlib.util import find_spec
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from recipes.constants import FUZZY_SEARCH_THRESHOLD
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +38,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.DatabaseRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,6 +50,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 500))
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
 ROOT_URLCONF = 'foodgram.urls'
 
 
@@ -64,6 +75,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 8))
+
 
 AUTH_USER_MODEL = 'user.User'
 
@@ -84,8 +100,37 @@ else:
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'foodgram'),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': int(os.getenv('DB_PORT', 5432)),
+            'OPTIONS': {
+                'options': '-c pg_trgm.similarity_threshold='
+                           f'{FUZZY_SEARCH_THRESHOLD}',
+            },
         }
     }
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv(
+    'DB_CONN_MAX_AGE', 60 if ASYNC_READ_VIEWS else 0
+))
+if ASYNC_READ_VIEWS and not DATABASES['default']['CONN_MAX_AGE']:
+    raise ImproperlyConfigured(
+        'ASYNC_READ_VIEWS требует постоянных подключений: '
+        'при DB_CONN_MAX_AGE=0 потоки пула открывают подключение '
+        'на каждый запрос к БД.'
+    )
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'False') == 'True'
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['foodgram.db_router.PrimaryReplicaRouter']
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -121,21 +166,97 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+SHOPPING_LIST_ROOT = os.getenv(
+    'SHOPPING_LIST_ROOT', BASE_DIR / 'shopping_lists'
+)
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+SHOPPING_LIST_PDF_THREADS = int(os.getenv('SHOPPING_LIST_PDF_THREADS', 2))
+SHOPPING_LIST_PDF_TIMEOUT = int(os.getenv('SHOPPING_LIST_PDF_TIMEOUT', 300))
+
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('TOKEN_CACHE_LOCATION', '/tmp/foodgram-tokens'),
+        'TIMEOUT': int(os.getenv('TOKEN_CACHE_TTL', 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+CACHE_LOCATION = os.getenv('CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION,
+    }
+
+if os.getenv('THROTTLE_CACHE_LOCATION'):
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION'),
+    }
+else:
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    }
+
+TOKEN_CACHE_ALIAS = 'tokens'
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+CATALOG_VERSION_CHECK_INTERVAL = float(
+    os.getenv('CATALOG_VERSION_CHECK_INTERVAL', 2)
+)
+
+WARM_UP_COMBINATIONS = int(os.getenv('WARM_UP_COMBINATIONS', 10))
+WARM_UP_PAGES = int(os.getenv('WARM_UP_PAGES', 3))
+WARM_UP_SAMPLE = int(os.getenv('WARM_UP_SAMPLE', 5000))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', '10/min'),
+        'shopping_cart_ip': os.getenv('THROTTLE_SHOPPING_CART_IP', '30/min'),
+        'subscriptions': os.getenv('THROTTLE_SUBSCRIPTIONS', '60/min'),
+        'subscriptions_ip': os.getenv('THROTTLE_SUBSCRIPTIONS_IP', '180/min'),
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', '30/min'),
+        'recipe_write_ip': os.getenv('THROTTLE_RECIPE_WRITE_IP', '90/min'),
+        'export': os.getenv('THROTTLE_EXPORT', '2/min'),
+        'export_ip': os.getenv('THROTTLE_EXPORT_IP', '6/min'),
+    },
 }
 
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'api.renderers.MessagePackRenderer'
+    )
+
 
 DJOSER = {
     'SERIALIZERS': {
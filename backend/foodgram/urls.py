@@ -3,9 +3,14 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import include, path
 
+from api.metrics import metrics
+from api.warmup import readiness
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('ready/', readiness, name='readiness'),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8080')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+threads = int(os.getenv('GUNICORN_THREADS', 2))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram-metrics')
+
+
+def on_starting(server):
+    """Метрики прошлого запуска не должны попасть в новые счетчики."""
+
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def when_ready(server):
+    """С preload_app приложение уже загружено: прогрев до fork воркеров."""
+
+    if server.cfg.preload_app:
+        from api.warmup import warm_up
+        warm_up()
+        server.log.info('Прогрев завершен в мастер-процессе')
+
+
+def post_worker_init(worker):
+    """Без preload_app каждый воркер прогревается сам."""
+
+    from api.warmup import warmed_up, warm_up
+    if not warmed_up.is_set():
+        warm_up()
+
+
+def child_exit(server, worker):
+    """Файлы метрик умершего воркера больше не обновляются."""
+
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,11 @@
 from django.contrib import admin
+from django.db.models import Prefetch
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 
+from .admin_utils import EstimatedCountPaginator, subquery_count
 from .models import (
+    Change,
     Tag,
     Recipe,
     Ingredient,
@@ -11,10 +15,18 @@ from .models import (
 )
 
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """Базовая админка для больших таблиц: без полного COUNT(*)."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredients
     extra = 0
     min_num = 1
+    autocomplete_fields = ('ingredients',)
 
 
 @admin.register(Tag)
@@ -32,15 +44,15 @@ class TagAdmin(admin.ModelAdmin):
 class IngredientAdmin(admin.ModelAdmin):
     """Настройка админ панели для ингридиентов."""
 
-    list_display = ('pk', 'name', 'measurement_unit')
+    list_display = ('pk', 'name', 'measurement_unit', 'usage_count')
     search_fields = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     list_display_links = ('name',)
     empty_value_display = 'пусто'
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     list_display = (
         'author',
         'name',
@@ -51,13 +63,29 @@ class RecipeAdmin(admin.ModelAdmin):
         'count_favorites',
         'pub_date',
     )
-    search_fields = ('name', 'author')
-    list_filter = ('author', 'tags', 'name',)
+    search_fields = ('name', 'author__username', 'author__email')
+    list_filter = ('tags',)
     list_display_links = ('name',)
+    autocomplete_fields = ('author', 'tags')
     inlines = (
         RecipeIngredientInline,
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredients',
+                queryset=RecipeIngredients.objects.select_related(
+                    'ingredients'
+                )
+            )
+        ).annotate(
+            favorites_count=subquery_count(Favorite, 'recipe')
+        )
+
     @admin.display(description='Ингредиенты')
     def display_ingredients(self, obj):
         return ', '.join([ingredient.ingredients.name
@@ -68,9 +96,12 @@ class RecipeAdmin(admin.ModelAdmin):
         return ', '.join([tag.name
                           for tag in obj.tags.all()])
 
-    @admin.display(description='Количетсво избранных рецептов')
+    @admin.display(
+        description='Количетсво избранных рецептов',
+        ordering='favorites_count'
+    )
     def count_favorites(self, obj):
-        return obj.favourites.count()
+        return obj.favorites_count
 
     @admin.display(description='Картинки')
     def show_image(self, obj):
@@ -81,25 +112,70 @@ class RecipeAdmin(admin.ModelAdmin):
 
 
 @admin.register(RecipeIngredients)
-class RecipeIngredientAdmin(admin.ModelAdmin):
+class RecipeIngredientAdmin(LargeTableAdmin):
     list_display = ('recipe', 'ingredients', 'amount')
+    list_select_related = ('recipe', 'ingredients')
+    autocomplete_fields = ('recipe', 'ingredients')
+
+    @staticmethod
+    def touch_recipes(recipe_ids):
+        """Правка ингредиентов меняет рецепт - обновляем updated_at.
+
+        update() не вызывает post_save, поэтому запись в журнал
+        изменений делается явно.
+        """
+
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+        Change.log_many(Recipe, recipe_ids, Change.UPDATE)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.touch_recipes((obj.recipe_id,))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.touch_recipes((obj.recipe_id,))
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        self.touch_recipes(recipe_ids)
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     """Настройка админ панели для корзины."""
 
-    list_filter = ('user', 'recipe')
     list_display = ('user', 'recipe')
-    search_fields = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
     empty_value_display = 'пусто'
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     """Настройка админ панели для избранного."""
 
     list_display = ('pk', 'user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
     list_display_links = ('user',)
     empty_value_display = 'пусто'
+
+
+@admin.register(Change)
+class ChangeAdmin(LargeTableAdmin):
+    """Журнал изменений только для просмотра."""
+
+    list_display = ('id', 'model', 'object_id', 'action', 'created_at')
+    list_filter = ('model', 'action')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
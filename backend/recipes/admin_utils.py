@@ -0,0 +1,51 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from .constants import ESTIMATED_COUNT_THRESHOLD
+
+
+def get_estimated_count(model, using):
+    """Оценка числа строк из статистики PostgreSQL без полного прохода."""
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            (model._meta.db_table,)
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def subquery_count(model, field):
+    """Число связанных строк для каждой записи страницы без GROUP BY."""
+
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки: оценка для больших таблиц без фильтров."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return queryset.values('pk').count()
@@ -7,3 +7,18 @@ FIELD_LEN_FOR_USER_MODEL = 150
 FIELD_LEN_EMAIL = 254
 REGEX_PATTERN = r'^[\w.@+-]+\Z'
 REGEX_ALLOWS = 'a-z/A-Z/0-9/. /@ /+/- '
+ESTIMATED_COUNT_THRESHOLD = 10000
+MAX_RECIPE_IDS = 100
+THROTTLE_BYTES_PER_TOKEN = 1024 * 1024
+THROTTLE_RECIPES_PER_TOKEN = 10
+MAX_IMAGE_SIDE = 4096
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+CHANGE_FIELD_CHAR = 32
+CHANGES_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 1000
+CHANGES_SETTLE_SECONDS = 10
+FUZZY_SEARCH_LIMIT = 20
+FUZZY_SEARCH_THRESHOLD = 0.15
+FUZZY_USAGE_WEIGHT = 0.05
+EXPORT_BATCH_SIZE = 100
+EXPORT_CHUNK_SIZE = 64 * 1024
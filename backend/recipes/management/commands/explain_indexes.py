@@ -0,0 +1,83 @@
+import re
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.db.models import F, Sum
+
+from recipes.models import Cart, Ingredient, Recipe, RecipeIngredients
+from user.models import Subscribe
+
+
+def get_hot_queries(vendor):
+    """Горячие запросы API и таблицы, которые они не должны сканировать."""
+
+    queries = [
+        ('Лента рецептов', Recipe.objects.all()[:6], (Recipe,)),
+        (
+            'Рецепты автора',
+            Recipe.objects.filter(author_id=1)[:3],
+            (Recipe,)
+        ),
+        (
+            'Подписчики автора',
+            Subscribe.objects.filter(author_id=1),
+            (Subscribe,)
+        ),
+        (
+            'Список покупок',
+            RecipeIngredients.objects.filter(
+                recipe__carts__user_id=1
+            ).values(
+                name=F('ingredients__name'),
+                measurement_unit=F('ingredients__measurement_unit')
+            ).annotate(
+                amount=Sum('amount')
+            ).order_by('name'),
+            (Cart, RecipeIngredients)
+        ),
+    ]
+    if vendor == 'postgresql':
+        queries.append((
+            'Поиск ингредиента',
+            Ingredient.objects.filter(name__istartswith='мо'),
+            (Ingredient,)
+        ))
+    return queries
+
+
+def find_seq_scans(vendor, plan, models):
+    tables = [model._meta.db_table for model in models]
+    if vendor == 'postgresql':
+        return [table for table in tables if f'Seq Scan on {table}' in plan]
+    return [
+        table for table in tables
+        if re.search(rf'SCAN (TABLE )?{table}\b(?! USING)', plan)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN горячих запросов: ошибка, если вместо индекса '
+        'используется последовательное сканирование'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        failed = []
+        using = router.db_for_read(Recipe)
+        vendor = connections[using].vendor
+        for name, queryset, models in get_hot_queries(vendor):
+            with transaction.atomic(using=using):
+                if vendor == 'postgresql':
+                    with connections[using].cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.using(using).explain()
+            seq_scans = find_seq_scans(vendor, plan, models)
+            status = 'SEQ SCAN ' + ', '.join(seq_scans) if seq_scans else 'OK'
+            self.stdout.write(f'{name}: {status}\n{plan}\n')
+            if seq_scans:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                'Последовательное сканирование: ' + ', '.join(failed)
+            )
@@ -2,9 +2,10 @@ from csv import reader
 from typing import Any
 
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
-from recipes.models import Ingredient, Tag
+from api.catalog import invalidate_catalog
+from recipes.models import Change, Ingredient, Tag
 
 CSV_FILES = {
     'ingredients.csv': (Ingredient, 2),
@@ -30,7 +31,10 @@ class Command(BaseCommand):
                         for row in csv_reader
                     ]
 
-                    model.objects.bulk_create(objects_to_create)
+                    with transaction.atomic():
+                        model.objects.bulk_create(objects_to_create)
+                        Change.log(model, None, Change.CREATE)
+                    invalidate_catalog(model)
 
                 self.stderr.write(f'Данные из файла {file} успешно загружены')
 
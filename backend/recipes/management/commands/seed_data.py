@@ -0,0 +1,293 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from api.ingredient_search import update_usage_counts
+from recipes.models import (
+    Cart,
+    Change,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    Tag,
+)
+from user.models import Subscribe, User
+
+SEED_PASSWORD = 'seed-Pass-123'
+IMAGE_COLORS = (
+    (230, 126, 34), (39, 174, 96), (41, 128, 185),
+    (192, 57, 43), (142, 68, 173), (241, 196, 15),
+)
+
+
+def zipf_cum_weights(size, skew):
+    """Накопленные веса распределения Ципфа: первые элементы популярнее."""
+
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n'))
+
+
+class BatchWriter:
+    """Пакетная запись строк: COPY на PostgreSQL, INSERT на остальных.
+
+    Оба пути пишут значения как есть, без pre_save полей, поэтому
+    auto_now_add не затирает заданные даты.
+    """
+
+    def __init__(self, model, fields, batch_size):
+        self.model = model
+        self.fields = fields
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql'
+        self.rows = []
+        self.count = 0
+
+    def add(self, *row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            self.copy_rows()
+        else:
+            self.insert_rows()
+        self.count += len(self.rows)
+        self.rows = []
+
+    def get_columns(self):
+        return ', '.join(
+            connection.ops.quote_name(
+                self.model._meta.get_field(field).column
+            ) for field in self.fields
+        )
+
+    def insert_rows(self):
+        fields = [self.model._meta.get_field(name) for name in self.fields]
+        placeholders = ', '.join(['%s'] * len(fields))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.model._meta.db_table} '
+                f'({self.get_columns()}) VALUES ({placeholders})',
+                [
+                    [field.get_db_prep_save(value, connection)
+                     for field, value in zip(fields, row)]
+                    for row in self.rows
+                ]
+            )
+
+    def copy_rows(self):
+        buffer = io.StringIO()
+        for row in self.rows:
+            buffer.write('\t'.join(map(copy_value, row)))
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = self.get_columns()
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {self.model._meta.db_table} ({columns}) '
+                'FROM STDIN',
+                buffer
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических пользователей, рецептов, избранного, '
+        'корзин и подписок с перекошенным распределением популярности'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число избранных рецептов на пользователя'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в корзине пользователя'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее число подписок на пользователя'
+        )
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--images', type=int, default=6)
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        if not tag_ids or not ingredient_ids:
+            raise CommandError(
+                'Теги и ингредиенты не найдены, сначала выполните import_data'
+            )
+        self.rng.shuffle(ingredient_ids)
+
+        user_ids = self.seed_users(options['users'])
+        images = self.make_images(options['images'])
+        recipe_ids = self.seed_recipes(
+            options['recipes'], user_ids, images
+        )
+        Change.log(Recipe, None, Change.CREATE)
+        self.seed_recipe_links(
+            recipe_ids, tag_ids, ingredient_ids,
+            options['ingredients_per_recipe']
+        )
+        update_usage_counts()
+        recipe_weights = zipf_cum_weights(len(recipe_ids), self.skew)
+        for model, average in ((Favorite, options['favorites']),
+                               (Cart, options['carts'])):
+            self.seed_user_links(
+                model, 'recipe_id', user_ids, recipe_ids, recipe_weights,
+                average
+            )
+        self.seed_user_links(
+            Subscribe, 'author_id', user_ids, user_ids,
+            zipf_cum_weights(len(user_ids), self.skew),
+            options['subscriptions']
+        )
+
+    def writer(self, model, *fields):
+        return BatchWriter(model, fields, self.batch_size)
+
+    def report(self, writer):
+        self.stdout.write(
+            f'{writer.model._meta.verbose_name_plural}: {writer.count}'
+        )
+
+    @transaction.atomic
+    def seed_users(self, count):
+        first_id = (User.objects.order_by('-id')
+                    .values_list('id', flat=True).first() or 0)
+        password = make_password(SEED_PASSWORD)
+        now = timezone.now()
+        writer = self.writer(
+            User, 'email', 'username', 'first_name', 'last_name', 'password',
+            'is_active', 'is_staff', 'is_superuser', 'date_joined',
+            'updated_at'
+        )
+        for number in range(first_id + 1, first_id + count + 1):
+            writer.add(
+                f'seed{number}@example.com', f'seed{number}', 'Имя',
+                'Фамилия', password, True, False, False, now, now
+            )
+        writer.flush()
+        self.report(writer)
+        return list(User.objects.filter(id__gt=first_id)
+                    .order_by('id').values_list('id', flat=True))
+
+    def make_images(self, count):
+        """Небольшой пул картинок, общий для всех рецептов."""
+
+        upload_to = Recipe._meta.get_field('image').upload_to
+        media_root = Path(settings.MEDIA_ROOT)
+        directory = media_root / upload_to
+        directory.mkdir(parents=True, exist_ok=True)
+        images = []
+        for number in range(count):
+            name = f'{upload_to}seed_{number}.png'
+            Image.new(
+                'RGB', (480, 320), IMAGE_COLORS[number % len(IMAGE_COLORS)]
+            ).save(media_root / name, 'PNG')
+            images.append(name)
+        return images
+
+    @transaction.atomic
+    def seed_recipes(self, count, user_ids, images):
+        first_id = (Recipe.objects.order_by('-id')
+                    .values_list('id', flat=True).first() or 0)
+        author_weights = zipf_cum_weights(len(user_ids), self.skew)
+        now = timezone.now()
+        writer = self.writer(
+            Recipe, 'name', 'author_id', 'text', 'image', 'cooking_time',
+            'pub_date', 'updated_at'
+        )
+        for number in range(count):
+            pub_date = now - timedelta(minutes=self.rng.randint(0, 525600))
+            writer.add(
+                f'Рецепт {first_id + number + 1}',
+                self.rng.choices(user_ids, cum_weights=author_weights)[0],
+                'Синтетическое описание рецепта. ' * self.rng.randint(1, 20),
+                self.rng.choice(images),
+                self.rng.randint(1, 180),
+                pub_date,
+                pub_date,
+            )
+        writer.flush()
+        self.report(writer)
+        return list(Recipe.objects.filter(id__gt=first_id)
+                    .order_by('id').values_list('id', flat=True))
+
+    @transaction.atomic
+    def seed_recipe_links(self, recipe_ids, tag_ids, ingredient_ids,
+                          per_recipe):
+        ingredient_weights = zipf_cum_weights(len(ingredient_ids), self.skew)
+        tags = self.writer(Recipe.tags.through, 'recipe_id', 'tag_id')
+        ingredients = self.writer(
+            RecipeIngredients, 'recipe_id', 'ingredients_id', 'amount'
+        )
+        for recipe_id in recipe_ids:
+            for tag_id in self.rng.sample(
+                tag_ids, self.rng.randint(1, min(3, len(tag_ids)))
+            ):
+                tags.add(recipe_id, tag_id)
+            chosen = set(self.rng.choices(
+                ingredient_ids,
+                cum_weights=ingredient_weights,
+                k=self.rng.randint(1, 2 * per_recipe)
+            ))
+            for ingredient_id in chosen:
+                ingredients.add(
+                    recipe_id, ingredient_id, self.rng.randint(1, 1000)
+                )
+        tags.flush()
+        ingredients.flush()
+        self.stdout.write(f'Теги рецептов: {tags.count}')
+        self.report(ingredients)
+
+    @transaction.atomic
+    def seed_user_links(self, model, target_field, user_ids, target_ids,
+                        cum_weights, average):
+        """Связи пользователь -> рецепт/автор, популярные цели чаще."""
+
+        writer = self.writer(model, 'user_id', target_field)
+        for user_id in user_ids:
+            chosen = set(self.rng.choices(
+                target_ids,
+                cum_weights=cum_weights,
+                k=self.rng.randint(0, 2 * average)
+            ))
+            if model is Subscribe:
+                chosen.discard(user_id)
+            for target_id in chosen:
+                writer.add(user_id, target_id)
+        writer.flush()
+        self.report(writer)
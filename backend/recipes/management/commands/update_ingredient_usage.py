@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from api.ingredient_search import update_usage_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчет числа рецептов у ингредиентов для ранжирования поиска'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        updated = update_usage_counts()
+        self.stdout.write(f'Обновлено ингредиентов: {updated}')
@@ -4,6 +4,7 @@ from django.db import models
 
 from user.models import User
 from .constants import (
+    CHANGE_FIELD_CHAR,
     NAME_CONST_CHAR,
     SLUG_CONST_CHAR,
     MIN_CONST_FOR_COOK,
@@ -54,6 +55,11 @@ class Ingredient(Name):
         max_length=NAME_CONST_CHAR,
         verbose_name='Единица измерения'
     )
+    usage_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число рецептов',
+    )
 
     class Meta():
         verbose_name = 'Ингредиент'
@@ -109,12 +115,26 @@ class Recipe(Name):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta(Name.Meta):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date',),
+                name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -212,3 +232,68 @@ class Cart(UserRecipe):
         verbose_name = 'Корзина'
         verbose_name_plural = 'В корзине'
         default_related_name = 'carts'
+
+
+class Change(models.Model):
+    """Журнал изменений рецептов и справочников для дельта-синхронизации.
+
+    Пустой object_id означает, что справочник перезагружен целиком.
+    """
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+    )
+
+    model = models.CharField(
+        max_length=CHANGE_FIELD_CHAR,
+        verbose_name='Модель'
+    )
+    object_id = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Id объекта'
+    )
+    action = models.CharField(
+        max_length=CHANGE_FIELD_CHAR,
+        choices=ACTIONS,
+        verbose_name='Действие'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Время изменения'
+    )
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('model', 'id'),
+                name='change_model_id_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.action} {self.model} {self.object_id or ""}'
+
+    @classmethod
+    def log(cls, model, object_id, action):
+        return cls.objects.create(
+            model=model._meta.model_name, object_id=object_id, action=action
+        )
+
+    @classmethod
+    def log_many(cls, model, object_ids, action):
+        return cls.objects.bulk_create(
+            cls(
+                model=model._meta.model_name,
+                object_id=object_id,
+                action=action
+            ) for object_id in object_ids
+        )
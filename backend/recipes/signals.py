@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Change, Ingredient, Recipe, Tag
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def log_saved(sender, instance, created, raw=False, **kwargs):
+    """Пишется в той же транзакции, что и изменение, если она открыта."""
+
+    if not raw:
+        Change.log(
+            sender, instance.pk, Change.CREATE if created else Change.UPDATE
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def log_deleted(sender, instance, **kwargs):
+    Change.log(sender, instance.pk, Change.DELETE)
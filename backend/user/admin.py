@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as AdminForUserBase
-from django.db.models import Count
 
+from recipes.admin_utils import EstimatedCountPaginator, subquery_count
+from recipes.models import Recipe
 from .models import User, Subscribe
 
 
@@ -18,23 +19,28 @@ class UserAdmin(AdminForUserBase):
         'get_recipe_count',
         'get_subscriber_count',
     )
-    list_filter = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     list_display_links = ('username',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         queryset = queryset.annotate(
-            recipe_count=Count('recipes', distinct=True),
-            subscriber_count=Count('subscribing', distinct=True)
+            recipe_count=subquery_count(Recipe, 'author'),
+            subscriber_count=subquery_count(Subscribe, 'author')
         )
         return queryset
 
-    @admin.display(description='Кол-во рецептов')
+    @admin.display(description='Кол-во рецептов', ordering='recipe_count')
     def get_recipe_count(self, obj):
         return obj.recipe_count
 
-    @admin.display(description='Кол-во подписчиков')
+    @admin.display(
+        description='Кол-во подписчиков',
+        ordering='subscriber_count'
+    )
     def get_subscriber_count(self, obj):
         return obj.subscriber_count
 
@@ -42,5 +48,8 @@ class UserAdmin(AdminForUserBase):
 @admin.register(Subscribe)
 class SubscribeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
-    list_filter = ('user', 'author')
-    search_fields = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
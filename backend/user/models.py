@@ -32,6 +32,10 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=FIELD_LEN_FOR_USER_MODEL,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         ordering = ('username',)